@@ -0,0 +1,68 @@
+#Import basic modules
+import os, time, json, hashlib, sqlite3
+
+#Class to keep the compare values (and captured regex groups and normalized values) of loaded notes in an SQLite file,
+#so that notes which haven't changed since an earlier run don't have to be read and processed again.
+#Every entry is stored for a note id and the hash of the group configuration it was created with (see 'configHash')
+#and is only used while the modification time of the note is still the same.
+class NoteCache:
+
+    #The maximum number of entries kept in the cache file and
+    #the number of days after which entries that haven't been used are removed
+    maxEntries = 1000000
+    maxDays = 60
+
+    #The version of the cached compare values
+    version = 2
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute('''create table if not exists notes (
+            id integer not null,
+            config text not null,
+            mod integer not null,
+            data text not null,
+            used integer not null,
+            primary key (id, config)
+        )''')
+        self.db.execute('create index if not exists notes_used on notes (used)')
+        self.now = int(time.time())
+
+    #Method to return a hash of everything that determines the compare values of a note in a group.
+    #The version is part of it, so that it can be raised when the compare values are created differently
+    @classmethod
+    def configHash(cls, config):
+        return hashlib.sha1(json.dumps([cls.version, config], sort_keys = True).encode('utf-8')).hexdigest()
+
+    #Method to return the cached (compare values, captured groups, normalized values) of the notes given as (id, modification time)
+    #as a dictionary (id -> data). Notes without an entry or which have been changed since are left out
+    def get(self, config, notes):
+        mods = dict(notes)
+        found = {}
+        for noteID, mod, data in self.db.execute(
+            f'select id, mod, data from notes where config = ? and id in ({",".join(str(n) for n in mods)})', (config,)):
+            if mods[noteID] == mod:
+                found[noteID] = json.loads(data)
+
+        #Mark the found entries as used
+        if len(found) > 0:
+            self.db.execute(f'update notes set used = ? where config = ? and id in ({",".join(str(n) for n in found)})',
+                (self.now, config))
+        return found
+
+    #Method to save the (compare values, captured groups, normalized values) of notes given as (id, modification time, data)
+    def put(self, config, notes):
+        self.db.executemany('insert or replace into notes (id, config, mod, data, used) values (?, ?, ?, ?, ?)',
+            [(noteID, config, mod, json.dumps(data, separators = (',', ':')), self.now) for noteID, mod, data in notes])
+
+    #Method to remove the entries that haven't been used for 'maxDays' days
+    #and the least recently used entries above 'maxEntries', then save and close the cache file
+    def close(self):
+        self.db.execute('delete from notes where used < ?', (self.now - self.maxDays * 24 * 60 * 60,))
+        numEntries = self.db.execute('select count(*) from notes').fetchone()[0]
+        if numEntries > self.maxEntries:
+            self.db.execute('delete from notes where rowid in (select rowid from notes order by used limit ?)',
+                (numEntries - self.maxEntries,))
+        self.db.commit()
+        self.db.close()
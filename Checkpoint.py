@@ -0,0 +1,47 @@
+#Import basic modules
+import os, json, time
+
+#Class to remember how far a comparison with a certain configuration has come,
+#so that it can be resumed when it is stopped before it is done (see 'Comparer.saveCheckpoint')
+class Checkpoint:
+
+    #The number of days after which the checkpoints of configurations that haven't been used are removed
+    maxDays = 60
+
+    #'fingerprint' identifies the loaded notes (see 'Comparer.getFingerprint'),
+    #'position' is the number of notes of the first group which have been compared with all of the other notes
+    #and 'duplicates' contains the note IDs of every duplicate combination found for those notes
+    def __init__(self, fingerprint, position, duplicates):
+        self.fingerprint = fingerprint
+        self.position = position
+        self.duplicates = duplicates
+
+    #Method to load a checkpoint from a file, or return 'None' when there is no (valid) checkpoint
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, 'r', encoding = 'utf-8') as file:
+                data = json.load(file)
+            return cls(data['fingerprint'], data['position'], data['duplicates'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    #Method to remove the checkpoint file, once the comparison is done
+    @classmethod
+    def remove(cls, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    #Method to save the checkpoint to a file and remove the checkpoints in the same folder that haven't been used for a while
+    def save(self, path):
+        with open(path + '.tmp', 'w', encoding = 'utf-8') as file:
+            json.dump({'fingerprint': self.fingerprint, 'position': self.position, 'duplicates': self.duplicates}, file, separators = (',', ':'))
+        os.replace(path + '.tmp', path)
+
+        folder = os.path.dirname(path)
+        for name in os.listdir(folder):
+            other = os.path.join(folder, name)
+            if name.startswith('checkpoint-') and other != path and os.path.getmtime(other) < time.time() - self.maxDays * 24 * 60 * 60:
+                os.remove(other)
@@ -1,5 +1,7 @@
 #Import basic modules
-import os, itertools, math, time, re
+import os, itertools, math, time, re, sqlite3, hashlib
+from array import array
+from contextlib import nullcontext
 
 #Import the main window object (mw) from aqt
 from aqt import mw
@@ -7,17 +9,44 @@ from aqt import mw
 #Import the "show info" tool from utils.py
 from aqt.utils import showInfo
 
+#Import the exception raised when a worker process of a parallel comparison stops unexpectedly
+from concurrent.futures.process import BrokenProcessPool
+
+#Import the function to create an SQL list of ids
+from anki.utils import ids2str
+
 #Import all of the Qt GUI library
 from aqt.qt import *
 
 #Import local .py modules
 from . import Utils
+from . import Text
 from . import Group
 from . import Node
+from . import Join
+from . import Planner
+from . import Parallel
+from . import Note
+from . import Store
+from . import Cache
+from . import LastRun
+from . import Checkpoint
+from . import Profiler
+from . import RunHistory
 echo = Utils.echo
 ProgressTimer = Utils.ProgressTimer
 Group = Group.Group
 Node = Node.Node
+Join = Join.Join
+Planner = Planner.Planner
+QueueNote = Note.QueueNote
+ValueTable = Store.ValueTable
+NoteStore = Store.NoteStore
+NoteCache = Cache.NoteCache
+LastRun = LastRun.LastRun
+Checkpoint = Checkpoint.Checkpoint
+Profiler = Profiler.Profiler
+RunHistory = RunHistory.RunHistory
 
 #Class to instantiate a Comparer object with all of the methods to compare cards between groups of cards
 #and to decide what to do with duplicates
@@ -29,9 +58,21 @@ class Comparer(QObject):
     echo = pyqtSignal(str)
     error = pyqtSignal(str)
     actionsDone = pyqtSignal()
+    duplicatesFound = pyqtSignal(int)
+    statistics = pyqtSignal(object)
+
+    #The maximum number of new rows and seconds after which the rows added to the queue are announced
+    batchSize = 1000
+    batchInterval = 0.5
 
-    def __init__(self, *args, **kwargs):
+    #The number of seconds after which the progress of a comparison is saved again (see 'saveCheckpoint')
+    checkpointInterval = 60
+
+    #'col' is the collection to compare the notes of, which is the collection of the main window by default
+    #and can be a collection that is opened without Anki (see Headless.py)
+    def __init__(self, col = None, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.col = col if col != None else mw.col
         self.groupNum = 2
         self.createFieldInfo()
         self.groups = []
@@ -40,7 +81,18 @@ class Comparer(QObject):
         self.conditionTree = Node('')
         self.conditionString = ''
         self.queue = []
+        self.numAnnounced = 0
+        self.announceTime = 0
         self.stop = False
+        self.fieldOrds = {}
+        self.workers = 1
+        self.useCache = True
+        self.incremental = False
+        self.resume = False
+        self.checkpointPath = None
+        self.profile = False
+        self.profiler = None
+        self.engine = ''
 
 
     #Method for creating a dictionary with card group types (deck, note_type, card_type and tag),
@@ -51,7 +103,7 @@ class Comparer(QObject):
         #Retrieve the note types (models) and their card types (templates) from the database
         self.fieldInfo = {'Deck': {}, 'Note type': {}, 'Tags': {}, 'Browser': {}}
         self.noteTypeIndex = {}
-        for model in mw.col.models.all():
+        for model in self.col.models.all():
 
             #Create model index (id -> name)
             self.noteTypeIndex[model['id']] = model['name']
@@ -61,6 +113,7 @@ class Comparer(QObject):
             noteTypeInfo = {
                 'name': model['name'],
                 'id': model['id'],
+                'mod': model['mod'],
                 'fields': fields,
                 'noteIDs': []
             }
@@ -82,55 +135,65 @@ class Comparer(QObject):
         #Determine all of the decks first
         #Also create a deck index (id -> name)
         self.deckIndex = {}
-        for deck in mw.col.decks.all():
+        decks = self.col.decks.all()
+        for deck in decks:
             self.fieldInfo['Deck'][deck['name']] = {
                 'id': deck['id'],
                 'fields': [],
                 'noteTypes': {},
                 'noteIDs': [],
-                'children': mw.col.decks.children(deck['id'])
+                'children': []
             }
             self.deckIndex[deck['id']] = deck['name']
 
-        #Then loop over all of the cards to determine which note types occur in the decks
-        for row in mw.col.db.execute('select cards.did, notes.mid from cards left join notes on cards.nid = notes.id'):
-            did = row[0]
-            mid = row[1]
-            deckName = self.deckIndex[did]
+        #Add every deck to the children of all of its parent decks ('Parent::Child'),
+        #which gives the same children in the same order as 'col.decks.children' without searching all of the decks for every deck
+        for deck in decks:
+            parts = deck['name'].split('::')
+            for i in range(1, len(parts)):
+                parent = self.fieldInfo['Deck'].get('::'.join(parts[:i]))
+                if parent != None:
+                    parent['children'].append((deck['name'], deck['id']))
+
+        #Then retrieve every combination of deck and note type that occurs in the cards once,
+        #in the order in which they first occur to add the note types in the same order as looping over all of the cards
+        for did, mid in self.col.db.execute('''select cards.did, notes.mid from cards left join notes on cards.nid = notes.id
+            group by notes.mid, cards.did order by min(cards.id)'''):
+            deck = self.fieldInfo['Deck'][self.deckIndex[did]]
             noteTypeName = self.noteTypeIndex[mid]
-            deck = self.fieldInfo['Deck'][deckName]
-            noteType = {}
-
-            #Only add the note type and fields if it does not already exist
-            if noteTypeName not in deck['noteTypes']:
-                noteType = self.fieldInfo['Note type'][noteTypeName]
-                deck['noteTypes'][noteTypeName] = noteType
-                deck['fields'].extend(noteType['fields'])
+            noteType = self.fieldInfo['Note type'][noteTypeName]
+            deck['noteTypes'][noteTypeName] = noteType
+            deck['fields'].extend(noteType['fields'])
         
-        #Since parent decks can have cards associated with them, recursively look for children of any
-        #deck and add any not present note types to that deck
+        #Since parent decks can have cards associated with them, look for children of any
+        #deck and add any not present note types to that deck. Every deck is only filled once
+        filled = set()
         for deckName in self.fieldInfo['Deck'].keys():
-            self.fillParentDecks(deckName)
+            self.fillParentDecks(deckName, filled)
 
         #Loop over all of the tags to add them to the fieldInfo but don't add any fields yet
-        for tag in mw.col.tags.all():
+        for tag in self.col.tags.all():
             self.fieldInfo['Tags'][tag] = {'fields': [], 'noteIDs': []}
 
 
-    #Recursive method to fill any parent decks with their children's
-    def fillParentDecks(self, deckName):
+    #Recursive method to fill any parent decks with their children's note types.
+    #'filled' contains the names of the decks which already contain the note types of all of their children
+    def fillParentDecks(self, deckName, filled):
         
         #Retrieve the current deck and it's already existing note types
         d = self.fieldInfo['Deck'][deckName]
-        noteTypes = d['noteTypes'].copy()
 
-        #Base case: An deck without children
-        if len(d['children']) == 0:
+        #Base case: A deck without children or which has already been filled
+        if deckName in filled or len(d['children']) == 0:
+            filled.add(deckName)
             return d['noteTypes']
 
         #Loop over all children to collect all of the note types present
+        noteTypes = d['noteTypes'].copy()
         for cName, cID in d['children']:
-            noteTypes = {**noteTypes, **self.fillParentDecks(cName)}
+            for name, noteType in self.fillParentDecks(cName, filled).items():
+                if name not in noteTypes:
+                    noteTypes[name] = noteType
 
         #Loop over all the retrieved note types
         #and add the fields of any note type not already contained
@@ -140,6 +203,7 @@ class Comparer(QObject):
 
         #Assign the retrieved note types to the deck's noteTypes propery
         d['noteTypes'] = noteTypes
+        filled.add(deckName)
 
         #Return the note types
         return noteTypes
@@ -165,10 +229,10 @@ class Comparer(QObject):
 
             #Depending on the chosen type the IDs are retrieved differently
             if self.groups[i].type == 'Deck':
-                noteIDs = mw.col.find_notes(f'deck:"{group.name}"')
+                noteIDs = self.col.find_notes(f'deck:"{group.name}"')
                 noteGroupIDs.extend(noteIDs)
             if self.groups[i].type == 'Note type':
-                noteIDs = mw.col.find_notes(f'note:"{group.name}"')
+                noteIDs = self.col.find_notes(f'note:"{group.name}"')
                 noteGroupIDs.extend(noteIDs)
 
             #This is disabled for tags, since this is already saved when tags are added
@@ -176,49 +240,130 @@ class Comparer(QObject):
             #     tags = self.groups[i].name.split(' ')
             #     tags = ['tag:' + t for t in tags]
             #     tagsQuery = ' and '.join(tags)
-            #     noteGroupIDs.append(mw.col.find_notes(tagsQuery))
-
-    #Method to turn a note object into a dictionary with all the necessary information
-    def getNoteDict(self, note, groupIndex):
-
-        #Retrieve the note
-        note = {'id': note.id, 'noteTypeID': note.mid, 'fields': dict(note.items()), 
-        'tags': note.tags, 'compareFields': [], 'replacement': '', 'tag': ''}
-
-        #Retrieve all the compare fields to be set
+            #     noteGroupIDs.append(self.col.find_notes(tagsQuery))
+
+    #Generator to load the notes with the given IDs of a group straight from the database in chunks of 'chunkSize' notes,
+    #which returns (id, note type id, modification time, usn, compare values, captured regex groups, normalized values) for every note in the same order as the IDs.
+    #Only the notes which are not in the cache (or have been changed since) are read and processed, the rest is taken from the cache.
+    #Notes that no longer exist are skipped.
+    def loadNotes(self, noteIDs, groupIndex, cache = None, chunkSize = 1000):
+        config = self.getGroupConfig(groupIndex)
+        getCompareValues = self.timed('Processing note fields', self.getCompareValues)
+        for start in range(0, len(noteIDs), chunkSize):
+            chunk = noteIDs[start : start + chunkSize]
+
+            #Retrieve the note type, modification time and usn of the notes of the chunk
+            #and the compare values of the notes which haven't changed from the cache
+            rows = {}
+            for row in self.col.db.execute(f'select id, mid, mod, usn from notes where id in {ids2str(chunk)}'):
+                rows[row[0]] = row
+            compareValues = {}
+            if cache != None and len(rows) > 0:
+                compareValues = cache.get(config, [(row[0], row[2]) for row in rows.values()])
+
+            #Process the fields of the other notes and save them in the cache
+            missing = [noteID for noteID in rows if noteID not in compareValues]
+            if len(missing) > 0:
+                newValues = []
+                for noteID, noteTypeID, fieldValues in self.col.db.execute(f'select id, mid, flds from notes where id in {ids2str(missing)}'):
+                    compareValues[noteID] = getCompareValues(noteTypeID, fieldValues, groupIndex)
+                    newValues.append((noteID, rows[noteID][2], compareValues[noteID]))
+                if cache != None:
+                    cache.put(config, newValues)
+
+            #Return the notes in the order of the IDs
+            for noteID in chunk:
+                if noteID in compareValues:
+                    yield (*rows[noteID], *compareValues[noteID])
+
+    #Method to open the cache with the compare values of notes (see Cache.py),
+    #or return 'None' when the cache is disabled or can't be opened
+    def openCache(self):
+        if not self.useCache:
+            return None
+        try:
+            return NoteCache(Utils.userFile('cache.db'))
+        except (sqlite3.Error, OSError):
+            return None
+
+    #Method to return the hash of everything that determines the compare values of the notes of a group:
+    #the note type (and its modification time) and name of every compare field, its normalization options and its regex when regex capture is enabled
+    def getGroupConfig(self, groupIndex):
+        fields = []
+        for f in self.groups[groupIndex].fields:
+            noteType = f['field']['noteType']
+            fields.append([noteType['id'], noteType['mod'], f['field']['name'], f['normalize'], f['regex'] if self.regexCapture else None])
+        return NoteCache.configHash([self.regexCapture, fields])
+
+    #Method to return the position of every compare field of a group in the field values of a note type
+    #(or 'None' for a compare field of another note type)
+    def getFieldOrds(self, groupIndex, noteTypeID):
+        key = (groupIndex, noteTypeID)
+        if key not in self.fieldOrds:
+            noteTypeFields = self.fieldInfo['Note type'][self.noteTypeIndex[noteTypeID]]['fields']
+            fieldNames = [f['name'] for f in noteTypeFields]
+            fieldOrds = []
+            for f in self.groups[groupIndex].fields:
+                if f['field']['noteType']['id'] == noteTypeID and f['field']['name'] in fieldNames:
+                    fieldOrds.append(fieldNames.index(f['field']['name']))
+                else:
+                    fieldOrds.append(None)
+            self.fieldOrds[key] = fieldOrds
+        return self.fieldOrds[key]
+
+    #Method to retrieve all of the fields of a note (name -> value) from the database,
+    #since only the fields that are compared are kept when the notes are loaded
+    def getNoteFields(self, noteID):
+        row = self.col.db.first('select mid, flds from notes where id = ?', noteID)
+        if row == None:
+            return {}
+        noteTypeFields = self.fieldInfo['Note type'][self.noteTypeIndex[row[0]]]['fields']
+        return dict(zip([f['name'] for f in noteTypeFields], row[1].split('\x1f')))
+
+    #Method to return the values of the compare fields of a group, their captured regex groups (if set)
+    #and their normalized values (or 'None' for a field without normalization options, see 'Text.normalizer')
+    #from the field values of a note as stored in the database. Only the fields which are compared are kept.
+    #The regular expression of a normalized field is matched against its normalized value
+    def getCompareValues(self, noteTypeID, fieldValues, groupIndex):
+
+        #Split the field values
+        fieldValues = fieldValues.split('\x1f')
+
+        #Retrieve the value of every compare field and the captured groups of its regex if set
+        compareValues = []
+        compareCaptures = []
+        compareKeys = []
         compareFields = self.groups[groupIndex].fields
-        for f in compareFields:
+        fieldOrds = self.getFieldOrds(groupIndex, noteTypeID)
+        for f, fieldOrd in zip(compareFields, fieldOrds):
 
             #If either the note doesn't have the set field or
             #the set field's note type doesn't match the note's note type id
             #the field value should be false
             fieldName = f['field']['name']
-            fieldValue = note['fields'].get(fieldName, False)
-            fieldNoteTypeID = f['field']['noteType']['id']
-            if fieldNoteTypeID != note['noteTypeID']:
-                fieldValue = False
-                fieldNoteTypeID = False
-
-            compareField = {
-                'name': fieldName,
-                'value': fieldValue.strip() if isinstance(fieldValue, str) else fieldValue,
-                'noteTypeID': fieldNoteTypeID,
-                'groups': None,
-            }
+            fieldValue = False
+            if fieldOrd != None and fieldOrd < len(fieldValues):
+                fieldValue = fieldValues[fieldOrd]
+            compareValues.append(fieldValue.strip() if isinstance(fieldValue, str) else fieldValue)
+
+            #When the field has normalization options, save its normalized value
+            key = None
+            if len(f['normalize']) > 0:
+                key = Text.normalizer(tuple(f['normalize']))(fieldValue) if isinstance(fieldValue, str) else fieldValue
+            compareKeys.append(key)
 
             #When regex capture is enabled, try to save the matched groups
+            groups = None
             if self.regexCapture:
                 try:
-                    match = re.search(f['regex'], fieldValue)
+                    match = re.search(f['regex'], key if key != None else fieldValue)
                 except re.error:
                     raise re.error(f'The regular expression \'{f["regex"]}\' of the field \'{fieldName}\' is invalid.')
-                if match != None:
+                if match != None and len(match.groups()) > 0:
                     groups = match.groups()
-                    compareField['groups'] = groups if len(groups) > 0 else None
-            note['compareFields'].append(compareField)
+            compareCaptures.append(groups)
 
-        #Return the note
-        return note
+        return compareValues, compareCaptures, compareKeys
 
     #Method to compare all groups and add any duplicate note combinations to the queue
     #Must be run in a thread when using a GUI to prevent it from freezing
@@ -231,134 +376,347 @@ class Comparer(QObject):
             if self.shortestLength == 0:
                 raise IndexError('One or more groups have no fields set.')
                 
-            #Clean the current queue
+            #Clean the current queue and the field positions of the previous run
             self.queue = []
+            self.numAnnounced = 0
+            self.announceTime = 0
+            self.fieldOrds = {}
+            self.checkpointPath = None
+
+            #Record the time of every phase for the run history (see 'saveHistory')
+            #and when profiling is enabled also the evaluations of every condition (see Profiler.py)
+            self.profiler = Profiler(self.conditionTree if self.advancedMode and self.profile else None)
 
             #Retrieve the note IDs per group into a single array
             noteGroups = [g.getSelectedNoteGroup()['noteIDs'].copy() for g in self.groups]
             
             #When not at least two of the groups have notes), raise an Exception
-            for notes in noteGroups:
-                if len(notes) == 0:
+            for noteIDs in noteGroups:
+                if len(noteIDs) == 0:
                     raise IndexError('Some groups do not contain any notes.')
 
             #Create a progress timer and link the local progress event to it
             progressTimer = ProgressTimer(0, '', 3)
             progressTimer.progress.connect(self.progress.emit)
 
-            #Create a dictionary for every note and add the fields that need to be compared, along with
-            #any regex if set
-            for groupIndex in range(self.groupNum):
-                
-                notes = noteGroups[groupIndex]
-
-                #Restart the timer for every group
-                numNotes = len(notes)
-                progressTimer.restart(numNotes, f'Loading notes of group {groupIndex+1}')
-
-                #Create every note dictionary with the correct fields for this group
-                for i in range(numNotes):
-                    nid = notes[i]
-                    notes[i] = self.getNoteDict(mw.col.getNote(nid), groupIndex)
-                    progressTimer.emitIntervalProgress(i+1)
-
-                #Check if the thread should be terminated
-                if self.stop:
-                    return
-
-            #Make an array with all possible combinations by index
-            combinations = itertools.product(*[range(len(ng)) for ng in noteGroups])
-            
-            #Calculate the number of combinations and set the start variables for the loop
-            numComb = 1
-            for ng in noteGroups:
-                numComb *= len(ng)
-            #self.echo.emit(str(numComb))
-            completed = 0
-            progressTimer.restart(numComb, 'Comparing notes...')
-
-            #Compare all the notes of every group to every note in every other group by iterating over the combinations array
-            #and add any duplicates to the queue
-            for noteIndices in combinations:
-
-                #Retrieve the correct notes by their indexes
-                notes = []
-                for i in range(self.groupNum):
-                    notes.append(noteGroups[i][noteIndices[i]].copy())
-
-                #Check for duplicates for these notes, if present, add a replacement if the field is set and add them to the queue
-                if self.checkDuplicate(notes):
-                    self.addActionInfo(notes)
-                    self.queue.append(notes)
-
-                #Emit the progress signal every 1 seconds
-                #To pass on the percentage and time left
-                completed += 1
-                progressTimer.emitIntervalProgress(completed)
-
-                #Check if the thread should be terminated
-                if self.stop:
-                    return
+            #Plan how the duplicates are found
+            planner = self.createPlanner()
+
+            #In incremental mode, retrieve the result of the last comparison with the same configuration (if any).
+            #Notes which have been modified or synced in since it started or which have been added to a group have changed.
+            #The usn of the collection is read from the database, since 'col.usn()' always returns -1 outside of the sync server
+            startTime = int(time.time())
+            startUsn = self.col.db.scalar('select usn from col')
+            runConfig = self.getRunConfig()
+            lastRunPath = Utils.userFile(f'lastRun-{runConfig}.json')
+            lastRun = LastRun.load(lastRunPath) if self.incremental else None
+            changed = [set() for g in range(self.groupNum)]
+            mods = [array('q') for g in range(self.groupNum)]
+
+            #Load the notes of every group into a note store with the fields that need to be compared, along with
+            #any captured regex groups if set. All of the stores share a single table of field values
+            valueTable = ValueTable()
+            stores = []
+            cache = self.openCache()
+            try:
+                for groupIndex in range(self.groupNum):
+                    
+                    noteIDs = noteGroups[groupIndex]
+                    fields = self.groups[groupIndex].fields
+                    store = NoteStore(valueTable, [f['field']['name'] for f in fields], self.regexCapture, [len(f['normalize']) > 0 for f in fields])
+                    prefilter = planner.createPrefilter(groupIndex, store)
+
+                    #Restart the timer for every group
+                    numNotes = len(noteIDs)
+                    progressTimer.restart(numNotes, f'Loading notes of group {groupIndex+1}')
+
+                    #Add every note with the correct fields for this group
+                    #and leave out any note that doesn't satisfy the conditions that only use this group
+                    lastNoteIDs = set(lastRun.noteIDs[groupIndex]) if lastRun != None else set()
+                    with self.phase('Loading notes'):
+                        for i, (noteID, noteTypeID, mod, usn, values, captures, keys) in enumerate(self.loadNotes(noteIDs, groupIndex, cache)):
+                            noteIndex = store.add(noteID, noteTypeID, values, captures, keys)
+                            if not prefilter(noteIndex):
+                                store.removeLast()
+                                continue
+                            mods[groupIndex].append(mod)
+                            if lastRun != None and (lastRun.changed(mod, usn) or noteID not in lastNoteIDs):
+                                changed[groupIndex].add(noteIndex)
+                            progressTimer.emitIntervalProgress(i+1)
+                    stores.append(store)
+
+                    #Check if the thread should be terminated
+                    if self.stop:
+                        return
+
+            #Save the cache, also when loading the notes is stopped
+            finally:
+                if cache != None:
+                    cache.close()
+
+            #Find the duplicates and add them to the queue
+            if lastRun != None:
+                with self.phase('Comparing notes'):
+                    self.findChangedDuplicates(stores, planner, progressTimer, lastRun, changed)
+            else:
 
+                #Save the progress every so often, so that the comparison can be resumed when it is stopped.
+                #When it should be resumed, continue from the checkpoint of the last comparison with the same configuration,
+                #as long as it was made for exactly the same notes
+                self.checkpointPath = self.getCheckpointPath(runConfig)
+                self.fingerprint = self.getFingerprint(stores, mods)
+                self.checkpointTime = time.time()
+                checkpoint = Checkpoint.load(self.checkpointPath) if self.resume else None
+                start = 0
+                if checkpoint != None and checkpoint.fingerprint == self.fingerprint:
+                    start = self.resumeCheckpoint(stores, checkpoint)
+                elif checkpoint != None:
+                    self.echo.emit('The notes have changed since the comparison was stopped, so it is started over.')
+                self.checkpointPosition = start
+
+                with self.phase('Comparing notes'):
+                    self.findDuplicates(stores, planner, progressTimer, start)
+                if start > 0:
+                    self.engine += ', resumed'
+
+            #Check if the thread should be terminated, but save how far the comparison has come first
+            if self.stop:
+                self.saveCheckpoint(self.checkpointPosition, True)
+                return
+
+            #The comparison is done, so it doesn't have to be resumed
+            if self.checkpointPath != None:
+                Checkpoint.remove(self.checkpointPath)
+
+            #Remember the result for a later incremental comparison when incremental mode is enabled
+            if self.incremental:
+                with self.phase('Saving the results'):
+                    try:
+                        LastRun(startTime, startUsn, noteGroups, [[note.id for note in row] for row in self.queue]).save(lastRunPath)
+                    except OSError:
+                        pass
+
+            #Add the run to the history of runs with this configuration
+            self.saveHistory(runConfig, noteGroups, stores)
 
         #When an IndexError is thrown, inform the user
         except IndexError as e:
             self.error.emit(f'Something went wrong: {e}')
 
+        #When profiling, emit what has been recorded
+        if self.profile and self.profiler != None:
+            self.statistics.emit(self.profiler.statistics())
+
         #When done, emit the finished signal
         self.finished.emit()
 
-    #Method to check for duplicate notes in a given array. 
-    #Returns 'True' if it are duplicates
-    def checkDuplicate(self, notes):
+    #Method to return a context manager which records the time of a phase during a run,
+    #and does nothing otherwise
+    def phase(self, name):
+        return self.profiler.phase(name) if self.profiler != None else nullcontext()
+
+    #Method to return a function which records the time of every call of 'function' as a phase when profiling,
+    #or the function itself otherwise so that it doesn't cost anything
+    def timed(self, name, function):
+        return self.profiler.timed(name, function) if self.profile and self.profiler != None else function
+
+    #Method to add a record of the completed run to the run history (see RunHistory.py), with the number of notes of every group,
+    #the number of combinations of the loaded notes (after leaving out the notes that can't be a duplicate) and the time of every phase
+    def saveHistory(self, runConfig, noteGroups, stores):
+        statistics = self.profiler.statistics()
+        record = {
+            'time': int(time.time()),
+            'version': RunHistory.codeVersion(os.path.dirname(os.path.abspath(__file__))),
+            'groupSizes': [len(noteIDs) for noteIDs in noteGroups],
+            'combinations': math.prod(len(store) for store in stores),
+            'duplicates': len(self.queue),
+            'seconds': statistics['seconds'],
+            'phases': {phase['name']: phase['seconds'] for phase in statistics['phases']},
+            'peakMemory': RunHistory.peakMemory(),
+            'engine': self.engine
+        }
+        try:
+            history = RunHistory(Utils.userFile('history.db'))
+            history.add(runConfig, record)
+            history.close()
+        except (sqlite3.Error, OSError):
+            pass
+
+    #Method to return the records of the earlier runs with the current configuration, starting with the latest one
+    def getHistory(self):
+        try:
+            history = RunHistory(Utils.userFile('history.db'))
+            runs = history.runs(self.getRunConfig())
+            history.close()
+            return runs
+        except (sqlite3.Error, OSError):
+            return []
+
+    #Method to plan how the duplicates can be found (see Planner.py)
+    def createPlanner(self):
+        planner = Planner.create(self.groupNum, self.advancedMode, self.conditionTree, self.shortestLength)
+        planner.profiler = self.profiler if self.profile else None
+        return planner
+
+    #Method to return the hash of the configuration of a comparison: the groups, their compare fields and the conditions
+    def getRunConfig(self):
+        groups = [[g.type, g.name, self.getGroupConfig(i)] for i, g in enumerate(self.groups)]
+        conditions = self.conditionTree.string if self.advancedMode else min([len(g.fields) for g in self.groups])
+        return NoteCache.configHash([groups, self.advancedMode, self.regexCapture, conditions])
+
+    #Method to return the path of the checkpoint file of a configuration (by default the current one)
+    def getCheckpointPath(self, runConfig = None):
+        return Utils.userFile(f'checkpoint-{self.getRunConfig() if runConfig == None else runConfig}.json')
+
+    #Method to return a fingerprint of the loaded notes of every group and their modification times ('mods'),
+    #which changes when notes are added, removed or edited
+    def getFingerprint(self, stores, mods):
+        fingerprint = hashlib.sha1()
+        for store, groupMods in zip(stores, mods):
+            fingerprint.update(store.noteIDs.tobytes())
+            fingerprint.update(groupMods.tobytes())
+            fingerprint.update(b'|')
+        return fingerprint.hexdigest()
+
+    #Method to add the duplicates of a checkpoint to the queue and return the position in the notes of the first group to continue from
+    def resumeCheckpoint(self, stores, checkpoint):
+        positions = [{noteID: i for i, noteID in enumerate(store.noteIDs)} for store in stores]
+        self.addToQueue(stores, [tuple(positions[g][noteID] for g, noteID in enumerate(noteIDs)) for noteIDs in checkpoint.duplicates])
+        return checkpoint.position
+
+    #Method to save a checkpoint with the duplicates found so far, where 'position' is the number of notes of the first group
+    #which have been compared with all of the other notes. Unless it is forced, it is only saved every 'checkpointInterval' seconds
+    def saveCheckpoint(self, position, force = False):
+        self.checkpointPosition = position
+        if self.checkpointPath == None or (not force and time.time() - self.checkpointTime < self.checkpointInterval):
+            return
+        self.checkpointTime = time.time()
+        try:
+            Checkpoint(self.fingerprint, position, [[note.id for note in row] for row in self.queue]).save(self.checkpointPath)
+        except OSError:
+            pass
+
+    #Method to return the settings needed to plan the comparison again in a worker process (see Parallel.py)
+    def getSettings(self):
+        return {
+            'groupNum': self.groupNum,
+            'advancedMode': self.advancedMode,
+            'conditionString': self.conditionTree.string,
+            'numRows': self.shortestLength,
+            'profile': self.profile
+        }
+
+    #Method to find all of the duplicate note combinations and add them to the queue.
+    #This gives the same queue as comparing every combination of notes, but only visits the combinations the indexes allow.
+    #When more than one worker is set, the notes are compared in several processes
+    def findDuplicates(self, stores, planner, progressTimer, start = 0):
+
+        #The progress is measured in the number of notes of the first group, starting from 'start' when a comparison is resumed
+        numNotes = len(stores[0])
+        progressTimer.restart(numNotes - start, 'Comparing notes...')
+
+        #Compare the notes in several processes when enabled, where the duplicates of every part of the notes
+        #are added to the queue as soon as that part and the parts before it are done.
+        #When the processes can't be started or stop unexpectedly, the remaining notes are compared in this thread instead.
+        #In a packaged build of Anki no processes can be started (see 'Parallel.isAvailable'), so the notes are compared in this thread straight away
+        compared = start
+        self.engine = 'single process'
+        if self.workers > 1 and not Parallel.isAvailable():
+            self.echo.emit('This build of Anki can\'t start other processes to compare the notes in, so they are compared in a single process instead.')
+        elif self.workers > 1:
+            def found(duplicates, end):
+                nonlocal compared
+                self.addToQueue(stores, duplicates)
+                compared = end
+                self.saveCheckpoint(end)
+
+            try:
+                Parallel.compare(stores, self.getSettings(), self.workers,
+                    progressTimer.emitIntervalProgress, lambda: self.stop, found, start, self.profiler)
+                self.engine = f'{self.workers} processes'
+            except (BrokenProcessPool, OSError) as e:
+                self.engine = f'{self.workers} processes, then a single process'
+                self.echo.emit(f'The notes could not be compared in several processes, so they are compared in a single process instead: {e}')
+            if self.stop:
+                return
+
+        if compared < numNotes:
+            def progress(completed):
+                progressTimer.emitIntervalProgress(compared - start + completed)
+                self.saveCheckpoint(compared + completed)
+
+            with self.phase('Building indexes'):
+                join = Join(stores, planner.createIndexes(stores), planner.condition(stores))
+            self.addToQueue(stores, join.combinations(progress, lambda: self.stop, compared))
+
+    #Method to find the duplicate note combinations when only some of the notes have changed since the last run
+    #('changed' contains the positions of the changed notes of every group) and add them to the queue.
+    #This gives the same queue as comparing every combination of notes, but only compares the changed notes to the other notes
+    def findChangedDuplicates(self, stores, planner, progressTimer, lastRun, changed):
+
+        self.engine = 'incremental'
+
+        #Carry over the duplicates of the last run without any changed notes, after checking that they are still duplicates
+        positions = [{noteID: i for i, noteID in enumerate(store.noteIDs)} for store in stores]
+        check = planner.check(stores)
+        duplicates = []
+        for noteIDs in lastRun.duplicates:
+            try:
+                noteIndices = tuple(positions[g][noteID] for g, noteID in enumerate(noteIDs))
+            except (KeyError, IndexError):
+                continue
+            if any(i in changed[g] for g, i in enumerate(noteIndices)):
+                continue
+            if check(list(noteIndices)):
+                duplicates.append(noteIndices)
 
-        #Check if all of the IDs are unique, if not return false
-        noteIDs = [n['id'] for n in notes]
-        if len(noteIDs) != len(set(noteIDs)):
-            return False
+        #For every group with changed notes, join its changed notes with the other groups,
+        #where the groups before it may only use unchanged notes so that every combination is only found once
+        condition = planner.condition(stores)
+        for groupIndex in range(self.groupNum):
+            if len(changed[groupIndex]) == 0:
+                continue
 
-        #If advanced mode is enabled, return 'True' if all set conditions are met
-        if self.advancedMode:
-            return self.conditionTree.solve(notes)
-            
-        #If advanced mode is disabled, return 'True' if all of the set fields with the same number exactly matches
-        else:
-            
-            #Only compare the mininum number of fields by looking at the fields for all of the groups one by one
-            duplicatePresent = True
-            for rowIndex in range(self.shortestLength):
-                if not self.compareFieldRow(rowIndex, notes):
-                    duplicatePresent = False
-                    break
-            
-            return duplicatePresent
+            order = [groupIndex] + [g for g in range(self.groupNum) if g != groupIndex]
+            allowed = [(lambda i, c = changed[g]: i not in c) if g < groupIndex else None for g in range(self.groupNum)]
+            with self.phase('Building indexes'):
+                join = Join(stores, planner.createIndexes(stores, order), condition, order, allowed)
+
+            firstNotes = sorted(changed[groupIndex])
+            progressTimer.restart(len(firstNotes), f'Comparing the changed notes of group {groupIndex+1}...')
+            duplicates.extend(join.combinations(progressTimer.emitIntervalProgress, lambda: self.stop, firstNotes = firstNotes))
+            if self.stop:
+                return
+
+        #Add the duplicates to the queue in the same order as comparing all of the notes
+        self.addToQueue(stores, sorted(duplicates))
+
+    #Method to create a queue row for every duplicate combination of note positions,
+    #add a replacement if the field is set and add it to the queue.
+    #The new rows are announced in batches of at most 'batchSize' rows or 'batchInterval' seconds,
+    #so that they can be shown while the comparison is still running without sending a signal for every row
+    def addToQueue(self, stores, duplicates):
+        addActionInfo = self.timed('Adding action info', self.addActionInfo)
+        for noteIndices in duplicates:
+            notes = [QueueNote(stores[groupIndex].note(noteIndex)) for groupIndex, noteIndex in enumerate(noteIndices)]
+            addActionInfo(notes)
+            self.queue.append(notes)
+
+            if len(self.queue) - self.numAnnounced >= self.batchSize or time.time() - self.announceTime >= self.batchInterval:
+                self.announceDuplicates()
+        self.announceDuplicates()
+
+    #Method to emit the number of rows in the queue when rows have been added since it was last emitted
+    def announceDuplicates(self):
+        if len(self.queue) > self.numAnnounced:
+            self.numAnnounced = len(self.queue)
+            self.announceTime = time.time()
+            self.duplicatesFound.emit(self.numAnnounced)
 
     #Recursive method to solve the conditions for a group of notes using the condition tree
     def solveConditions(self, notes):
         return self.conditionTree.solve(notes)
 
-    #Method to compare a single field row by looking at the specific field values in the notes, returns 'True' if they all match.
-    def compareFieldRow(self, rowIndex, notes):
-        duplicatePresent = True
-
-        #Compare the field values
-        compareFieldValue = ''
-        for groupIndex in range(self.groupNum):
-            note = notes[groupIndex]
-            fieldValue = note['compareFields'][rowIndex]['value']
-
-            #Save the first field value as the value to compare to
-            if groupIndex == 0:
-                compareFieldValue = fieldValue
-                continue
-
-            #Compare this value to all others
-            if fieldValue != compareFieldValue or compareFieldValue == False:
-                duplicatePresent = False
-                break
-
-        return duplicatePresent
-
     #Method to add the tag / replacement of the group to the notes
     def addActionInfo(self, notes):
         for groupIndex in range(len(notes)):
@@ -366,12 +724,12 @@ class Comparer(QObject):
             #Save the tag
             group = self.groups[groupIndex]
             note = notes[groupIndex]
-            note['tag'] = group.duplicateActionTag
+            note.tag = group.duplicateActionTag
 
             #When the field reference is 'None' and a replacement is set
             #it is just a string so save it into the note
             if group.replaceFieldReference == None and group.duplicateActionReplacement != '':
-                note['replacement'] = group.duplicateActionReplacement
+                note.replacement = group.duplicateActionReplacement
             
             #Otherwise try to retrieve the field value from the other notes and save it if it is valid
             else:
@@ -380,42 +738,68 @@ class Comparer(QObject):
 
                     #When 'remove cloze' is checked, remove any cloze markup
                     if self.groups[groupIndex].removeCloze:
-                        replacement = re.sub(r'{{.+?::|::.+?}}|}}', '', str(replacement))
-
-                    note['replacement'] = replacement
-
-    #Method to perform the set actions on the cards in the queue
+                        replacement = Text.removeCloze(str(replacement))
+
+                    note.replacement = replacement
+
+    #Method to perform the actions of 'performActions' on the notes that still exist in bulk:
+    #replace the fields of the 'kept' notes, add their tags, (un)suspend their cards and delete the 'deleted' notes
+    def performBulkActions(self, kept, deleted, suspended, tags, replacements):
+
+        #Save all of the notes with replaced fields at once
+        notes = []
+        for noteID, fields in replacements.items():
+            if noteID in kept:
+                noteObject = self.col.get_note(noteID)
+                for name, replacement in fields.items():
+                    noteObject[name] = replacement
+                notes.append(noteObject)
+        if len(notes) > 0:
+            self.col.update_notes(notes)
+
+        #Add every tag to all of its notes at once
+        for tag, tagNoteIDs in tags.items():
+            tagNoteIDs = [noteID for noteID in tagNoteIDs if noteID in kept]
+            if len(tagNoteIDs) > 0:
+                self.col.tags.bulk_add(tagNoteIDs, tag)
+
+        #Suspend or unsuspend all of the cards of the notes at once with the scheduler
+        for suspend, method in [(True, self.col.sched.suspend_cards), (False, self.col.sched.unsuspend_cards)]:
+            suspendNoteIDs = [noteID for noteID, s in suspended.items() if s == suspend and noteID in kept]
+            if len(suspendNoteIDs) > 0:
+                method(self.col.db.list(f'select id from cards where nid in {ids2str(suspendNoteIDs)}'))
+
+        #Delete all of the notes at once
+        if len(deleted) > 0:
+            self.col.remove_notes(list(deleted))
+
+    #Method to perform the set actions on the cards in the queue.
+    #Only the first 'maxRows' rows are performed, the remaining rows are left in the queue
     def performActions(self, maxRows):
 
-        #Loop over all the notes in every row and perform the appropiate actions on it
-        breaked = False
-        for rowIndex, row in enumerate(self.queue):
+        #Determine what happens to every note of the rows, with the same result as performing the actions row by row:
+        #a deleted note is deleted whatever else was set for it, the last suspend or unsuspend of a note is used,
+        #every tag is added and the last replacement of every field is used
+        numRows = max(maxRows, 1)
+        deleted = set()
+        suspended = {}
+        tags = {}
+        replacements = {}
+        for row in self.queue[:numRows]:
             for groupIndex, note in enumerate(row):
-                action = note.get('action', self.groups[groupIndex].duplicateAction)
+                action = note.action if note.action != None else self.groups[groupIndex].duplicateAction
 
-                #Try to retrieve the note, when it is not found, skip it
-                try:
-                    noteObject = mw.col.getNote(note['id'])
-                except:
-                    continue
-
-                #Perform the appropiate action
                 if action == 'Delete':
-                    mw.col.remNotes([noteObject.id])
+                    deleted.add(note.id)
                 elif action == 'Suspend':
-                    for card in noteObject.cards():
-                        card.queue = -1
-                        card.flush()
+                    suspended[note.id] = True
                 elif action == 'Unsuspend':
-                    for card in noteObject.cards():
-                        card.queue = 0
-                        card.flush()
+                    suspended[note.id] = False
                 elif action == 'Tag with...':
                     #tag = self.groups[groupIndex].duplicateActionTag
-                    tag = note['tag']
+                    tag = note.tag
                     if tag != '':
-                        noteObject.addTag(tag)
-                        noteObject.flush()
+                        tags.setdefault(tag, []).append(note.id)
                 elif action.startswith('Replace'):
 
                     #Retrieve the field number of the field in question
@@ -426,23 +810,31 @@ class Comparer(QObject):
                         #Only save the replacement when the replacement is not an empty string
                         #and the compare field value is not 'False'
                         #since it is otherwise not a field that is present in the note
-                        field = note['compareFields'][fieldNum - 1]
-                        replacement = note['replacement']
+                        field = note.compareFields[fieldNum - 1]
+                        replacement = note.replacement
                         if field['value'] != False and replacement != '':
-                            noteObject[field['name']] = replacement
-                            noteObject.flush()
-
-            #When the number of rows exceeds the max
-            #replace the current queue for the remaining items
-            #and break out of the loop
-            #and emit the actionsDone event
-            if rowIndex + 1 >= maxRows:
-                breaked = True
-                self.queue = self.queue[rowIndex + 1 : len(self.queue)]
-                echo('Done')
-                self.actionsDone.emit()
-                break
-
-        #Let the user know it is done
-        if breaked == False:
-            echo('Done')
+                            replacements.setdefault(note.id, {})[field['name']] = replacement
+
+        #Skip the notes that no longer exist and the notes that will be deleted anyway
+        noteIDs = deleted | suspended.keys() | replacements.keys() | set(itertools.chain(*tags.values()))
+        existing = set(self.col.db.list(f'select id from notes where id in {ids2str(noteIDs)}'))
+        kept = existing - deleted
+
+        #Perform all of the actions in bulk as a single entry in the undo history of the collection ('Edit -> Undo').
+        #Every operation of Anki is saved on its own, so when one of them fails the actions performed before it are undone again
+        undoEntry = self.col.add_custom_undo_entry('Note Comparer actions')
+        try:
+            self.performBulkActions(kept, existing & deleted, suspended, tags, replacements)
+        except Exception:
+            self.col.merge_undo_entries(undoEntry)
+            self.col.undo()
+            raise
+        self.col.merge_undo_entries(undoEntry)
+
+        #Let the user know it is done.
+        #When the number of rows exceeds the max replace the current queue for the remaining items
+        #and emit the actionsDone event
+        echo('Done')
+        if len(self.queue) >= numRows:
+            self.queue = self.queue[numRows:]
+            self.actionsDone.emit()
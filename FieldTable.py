@@ -15,6 +15,7 @@ from aqt.qt import *
 from . import Utils
 echo = Utils.echo
 from . import CustomQt
+from . import Text
 
 #Class to instantiate a GroupWindow object
 class FieldTable(QTableWidget):
@@ -34,16 +35,22 @@ class FieldTable(QTableWidget):
         self.group = group
 
         #Set the default table
-        self.setColumnCount(3)
+        self.setColumnCount(4)
         self.hideColumn(1)
-        self.setHorizontalHeaderLabels(['Fields', 'RegEx', 'Delete'] )
+        self.setHorizontalHeaderLabels(['Fields', 'RegEx', 'Normalize', 'Delete'] )
+        self.horizontalHeaderItem(2).setToolTip('''Choose how the values of a field are normalized before they are compared,
+        for example to see '<code>&lt;b&gt;Dog&lt;/b&gt;</code>' and '<code>dog&amp;nbsp;</code>' as the same value.
+        The regular expression of a normalized field is matched against the normalized value,
+        but the queue still shows the field as it is.''')
         self.addFieldRow()
 
         #Resize the columns
         self.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
         self.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
         self.horizontalHeader().setSectionResizeMode(2, QHeaderView.Fixed)
-        self.horizontalHeader().resizeSection(2, 65)
+        self.horizontalHeader().resizeSection(2, 90)
+        self.horizontalHeader().setSectionResizeMode(3, QHeaderView.Fixed)
+        self.horizontalHeader().resizeSection(3, 65)
 
     #Method trigger to update the field in the Comparer object and also adds a new row if the index = row count - 1
     def selectField(self, fieldRow):
@@ -105,6 +112,12 @@ class FieldTable(QTableWidget):
 
         self.triggers = True
 
+    #Method trigger to save the normalization options checked in the menu of a row
+    def selectNormalization(self, fieldRow, normalizeButton):
+        options = [action.option for action in normalizeButton.menu().actions() if action.isChecked()]
+        self.group.setFieldNormalization(fieldRow.rowIndex, options)
+        normalizeButton.setText(f'{len(options)} chosen' if len(options) > 0 else 'None')
+
 
     #Method to add a new row to the field table
     def addFieldRow(self, update = False):
@@ -135,12 +148,25 @@ class FieldTable(QTableWidget):
         regexRow.textChanged.connect(lambda: self.enterRegex(regexRow))
         self.addTableWidget(currentRowCount, 1, regexRow)
 
-        #Add a delete button to the third column
+        #Place a button with a menu of the normalization options at the third column
+        normalizeButton = QToolButton(self)
+        normalizeButton.setText('None')
+        normalizeButton.setPopupMode(QToolButton.InstantPopup)
+        normalizeMenu = QMenu(normalizeButton)
+        for option, description in Text.NORMALIZATIONS:
+            action = normalizeMenu.addAction(description)
+            action.option = option
+            action.setCheckable(True)
+            action.toggled.connect(lambda checked: self.selectNormalization(fieldRow, normalizeButton))
+        normalizeButton.setMenu(normalizeMenu)
+        self.addTableWidget(currentRowCount, 2, normalizeButton)
+
+        #Add a delete button to the fourth column
         delButton = QPushButton('🗑', self)
         delButton.clicked.connect(lambda: self.selectDelete(fieldRow))
-        self.addTableWidget(currentRowCount, 2, delButton)
+        self.addTableWidget(currentRowCount, 3, delButton)
 
-        #Update all the regex line edit and delete button states
+        #Update all the regex line edit, normalize button and delete button states
         self.updateRowStates()
 
         #Add the vertical header item
@@ -187,7 +213,7 @@ class FieldTable(QTableWidget):
         for i in range(rowIndex, self.rowCount()):
             self.verticalHeaderItem(i).setText(f'F{i+1}')
 
-        #Update the RegEx line edits and delete buttons 
+        #Update the RegEx line edits, normalize buttons and delete buttons 
         self.updateRowStates()
 
     #Method to clear all the field rows
@@ -202,29 +228,28 @@ class FieldTable(QTableWidget):
         self.setItem(rowIndex, columnIndex, item)
         self.setCellWidget(rowIndex, columnIndex, widget)
 
-    #Method to update the RegEx line edit and delete button active states
+    #Method to update the RegEx line edit, normalize button and delete button active states
     def updateRowStates(self):
         rowCount = self.rowCount()
 
-        #When the row count is 1 disable the first line edit and button
+        #When the row count is 1 disable the first line edit and buttons
         if rowCount == 1:
-            self.item(0, 1).widget.setEnabled(False)
-            self.item(0, 2).widget.setEnabled(False)
+            for j in range(1, 4):
+                self.item(0, j).widget.setEnabled(False)
         
-        #When the row count is greater than 1, disable the last button
+        #When the row count is greater than 1, disable the last buttons
         #and enable all other buttons
         elif rowCount > 1:
-            self.item(rowCount-1, 1).widget.setEnabled(False)
-            self.item(rowCount-1, 2).widget.setEnabled(False)
+            for j in range(1, 4):
+                self.item(rowCount-1, j).widget.setEnabled(False)
             for i in range(rowCount-1):
-                self.item(i, 1).widget.setEnabled(True)
-                self.item(i, 2).widget.setEnabled(True)
+                for j in range(1, 4):
+                    self.item(i, j).widget.setEnabled(True)
 
     def setEnabledAll(self, boolean):
         for i in range(self.rowCount()):
-            self.item(i, 0).widget.setEnabled(boolean)
-            self.item(i, 1).widget.setEnabled(boolean)
-            self.item(i, 2).widget.setEnabled(boolean)
+            for j in range(4):
+                self.item(i, j).widget.setEnabled(boolean)
 
         if boolean == True:
             self.updateRowStates()
@@ -12,6 +12,9 @@ from aqt.utils import showInfo
 #Import all of the Qt GUI library
 from aqt.qt import *
 
+#Import the function to create an SQL list of ids
+from anki.utils import ids2str
+
 #Import local .py modules
 from . import Utils
 from . import Node
@@ -23,6 +26,9 @@ Node = Node.Node
 #An fieldinfo object is required (create with the static method Comparer::createFieldInfo)
 class Group:
 
+    #The number of notes of which the note types are retrieved from the database at once
+    chunkSize = 10000
+
     def __init__(self, groupIndex, Comparer):
         self.groupIndex = groupIndex
         self.Comparer = Comparer
@@ -65,17 +71,26 @@ class Group:
         except Exception:
             return None   
 
-    #Method to add or update an field
+    #Method to add or update an field.
+    #The normalization options (see 'Text.NORMALIZATIONS') of a row are kept when another field is chosen,
+    #since they are still shown in the row
     def addUpdateFieldRow(self, rowIndex, fieldIndex):
         
-        newFieldRow = {'field': self.getPossibleField(fieldIndex), 'regex': ''}
+        newFieldRow = {'field': self.getPossibleField(fieldIndex), 'regex': '', 'normalize': []}
         oldFieldRow = self.getFieldRow(rowIndex)
         
         if oldFieldRow == None:
             self.fields.append(newFieldRow)
         elif newFieldRow['field'] != oldFieldRow['field']:
+            newFieldRow['normalize'] = oldFieldRow['normalize']
             self.fields[rowIndex] = newFieldRow
 
+    #Method to set the normalization options of an added field
+    def setFieldNormalization(self, rowIndex, options):
+        fieldRow = self.getFieldRow(rowIndex)
+        if fieldRow != None:
+            fieldRow['normalize'] = options
+
     #Method to remove an added field
     def removeFieldRow(self, rowIndex):
         self.fields.pop(rowIndex)
@@ -93,7 +108,7 @@ class Group:
         tagString = ' '.join(tags)
         
         #Retrieve all of the ids of the notes
-        noteIDs = mw.col.find_notes(' and '.join([f'tag:{t}' for t in tags ]))
+        noteIDs = self.Comparer.col.find_notes(' and '.join([f'tag:{t}' for t in tags ]))
 
         self.createFields(noteIDs, 'Tags', tagString)
 
@@ -109,7 +124,7 @@ class Group:
 
     #Method to add fields into the fieldInfo depending on the given group type and name
     def createFields(self, noteIDs, groupType, groupName):
-        echo(len(noteIDs))
+
         #If the current group name doesn't exist yet in the group type dictionary create it
         if groupName not in self.fieldInfo[groupType]:
             self.fieldInfo[groupType][groupName] = {'fields': [], 'noteIDs': []}
@@ -117,14 +132,18 @@ class Group:
         elif len(self.fieldInfo[groupType][groupName]['fields']) > 0:
             return
 
-        #Loop over all of the notes to determine their note types and thus their fields.
+        #Determine the note types of the notes and thus their fields, in the order in which they first occur in the notes.
+        #The note types are retrieved in chunks of 'chunkSize' notes at once instead of loading every note
         group = self.fieldInfo[groupType][groupName]
         noteTypeFields = {}
-        for noteID in noteIDs:
-            note = mw.col.getNote(noteID)
-            noteTypeName = self.Comparer.noteTypeIndex[note.mid]
-            if noteTypeName not in noteTypeFields:
-                noteTypeFields[noteTypeName] = self.fieldInfo['Note type'][noteTypeName]['fields']
+        for start in range(0, len(noteIDs), self.chunkSize):
+            chunk = noteIDs[start : start + self.chunkSize]
+            noteTypeIDs = dict(self.Comparer.col.db.execute(f'select id, mid from notes where id in {ids2str(chunk)}'))
+            for noteID in chunk:
+                if noteID in noteTypeIDs:
+                    noteTypeName = self.Comparer.noteTypeIndex[noteTypeIDs[noteID]]
+                    if noteTypeName not in noteTypeFields:
+                        noteTypeFields[noteTypeName] = self.fieldInfo['Note type'][noteTypeName]['fields']
 
         #Then, add these fields to the fields array of the group of tags entry
         #and also add the note IDs to the tag group
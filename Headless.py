@@ -0,0 +1,168 @@
+#Import basic modules
+import os, re, sys, json, time, sqlite3, argparse
+
+#Import local .py modules
+from . import Comparer
+from . import Group
+from . import ReadOnlyCollection
+from . import Text
+Comparer = Comparer.Comparer
+Group = Group.Group
+ReadOnlyCollection = ReadOnlyCollection.ReadOnlyCollection
+
+#This module runs a comparison without the dialog and without an Anki window, for example on a server:
+#
+#   python -m <add-on folder>.Headless collection.anki2 job.json queue.json
+#
+#It needs the 'aqt' and 'anki' packages (which can be installed with pip), but not a running Anki.
+#The collection is opened read-only, so the actions are not performed but written to the queue file with the duplicates.
+#The job file describes the comparison in the same way as the dialog does, for example:
+#
+#   {
+#       "groups": [
+#           {"type": "Deck", "name": "Vocabulary", "fields": [{"name": "Front", "noteType": "Basic", "regex": ""}], "action": "Delete"},
+#           {"type": "Note type", "name": "Basic", "fields": [{"name": "Front", "normalize": ["html", "case"]}], "action": "Tag with...", "tag": "duplicate"}
+#       ],
+#       "advancedMode": false,
+#       "regexCapture": false,
+#       "conditions": "",
+#       "workers": 4
+#   }
+#
+#The type of a group is 'Deck', 'Note type' or 'Tags' (with the tags separated by spaces as its name).
+#A field only needs its note type when the notes of the group have several note types with a field with that name.
+#The normalization options of a field are listed in 'Text.NORMALIZATIONS' ('cloze', 'html', 'entities', 'unicode', 'case' and 'whitespace').
+#Every group may also set a 'replacement' and 'removeCloze' for the replace actions ('Replace F1 with...'),
+#and the job may set 'useCache' and 'incremental' (both false by default)
+
+#Function to read a job file
+def loadJob(path):
+    with open(path, 'r', encoding = 'utf-8') as file:
+        job = json.load(file)
+    if not isinstance(job, dict) or not isinstance(job.get('groups'), list) or len(job['groups']) < 2:
+        raise ValueError(f'The job file \'{path}\' does not describe at least two groups.')
+    return job
+
+#Function to create a comparer for the notes of a collection with the groups, fields, regexes and conditions of a job
+def createComparer(col, job):
+    comparer = Comparer(col)
+    comparer.groupNum = len(job['groups'])
+    comparer.advancedMode = job.get('advancedMode', False)
+    comparer.regexCapture = job.get('regexCapture', False)
+    comparer.workers = job.get('workers', 1)
+    comparer.useCache = job.get('useCache', False)
+    comparer.incremental = job.get('incremental', False)
+
+    for groupIndex, groupJob in enumerate(job['groups']):
+        group = Group(groupIndex, comparer)
+        comparer.groups.append(group)
+
+        #Select the notes of the group
+        group.type = groupJob.get('type', 'Deck')
+        if group.type == 'Tags':
+            group.name = group.createGroupTagsFields(groupJob['name'].split())
+        elif group.type in ('Deck', 'Note type'):
+            group.name = groupJob['name']
+            if group.getSelectedNoteGroup() == None:
+                raise ValueError(f'Group {groupIndex+1}: the {group.type.lower()} \'{group.name}\' does not exist.')
+        else:
+            raise ValueError(f'Group {groupIndex+1}: the type \'{group.type}\' is not supported, use \'Deck\', \'Note type\' or \'Tags\'.')
+
+        #Select the compare fields, where the note type of a field is only needed when the name isn't unique in the group
+        for fieldJob in groupJob.get('fields', []):
+            fields = [f for f in group.getPossibleFields() if f['name'] == fieldJob['name']
+                and fieldJob.get('noteType', f['noteType']['name']) == f['noteType']['name']]
+            if len(fields) == 0:
+                raise ValueError(f'Group {groupIndex+1}: the notes do not have a field \'{fieldJob["name"]}\'.')
+            if len(fields) > 1:
+                raise ValueError(f'Group {groupIndex+1}: several note types have a field \'{fieldJob["name"]}\', set its note type.')
+            normalize = fieldJob.get('normalize', [])
+            unknown = [o for o in normalize if o not in [option for option, description in Text.NORMALIZATIONS]]
+            if len(unknown) > 0:
+                raise ValueError(f'Group {groupIndex+1}: the normalization option \'{unknown[0]}\' does not exist.')
+            group.fields.append({'field': fields[0], 'regex': fieldJob.get('regex', ''), 'normalize': normalize})
+            group.actions.append(f'Replace F{len(group.fields)} with...')
+
+        #Set the action of the duplicates of the group
+        group.duplicateAction = groupJob.get('action', 'Nothing')
+        if group.duplicateAction not in group.actions:
+            raise ValueError(f'Group {groupIndex+1}: the action \'{group.duplicateAction}\' does not exist.')
+        group.duplicateActionTag = groupJob.get('tag', '')
+        group.setduplicateActionReplacement(groupJob.get('replacement', ''))
+        group.removeCloze = groupJob.get('removeCloze', False)
+
+    #Finish the condition tree when the advanced options are enabled
+    if comparer.advancedMode:
+        comparer.conditionString = job.get('conditions', '')
+        comparer.conditionTree.setString(comparer.conditionString)
+        comparer.conditionTree.createChildren()
+
+    return comparer
+
+#Function to write the queue of a comparer to a file, with the note ID, action, tag, replacement and compare fields
+#of every note of every duplicate row
+def writeQueue(comparer, path):
+    rows = []
+    for row in comparer.queue:
+        rows.append([{
+            'id': note.id,
+            'action': note.action if note.action != None else comparer.groups[groupIndex].duplicateAction,
+            'tag': note.tag,
+            'replacement': note.replacement,
+            'fields': {f['name']: f['value'] for f in note.compareFields}
+        } for groupIndex, note in enumerate(row)])
+
+    with open(path + '.tmp', 'w', encoding = 'utf-8') as file:
+        json.dump({
+            'collection': os.path.abspath(comparer.col.path),
+            'created': int(time.time()),
+            'groups': [{'type': g.type, 'name': g.name} for g in comparer.groups],
+            'rows': rows
+        }, file, ensure_ascii = False, separators = (',', ':'))
+    os.replace(path + '.tmp', path)
+
+#Function to compare the notes of a collection file with a job file and write the queue to a file.
+#The messages and progress of the comparison are passed to 'log'. Returns the number of duplicate rows
+def runJob(collectionPath, jobPath, queuePath, log = print):
+    job = loadJob(jobPath)
+    col = ReadOnlyCollection(collectionPath)
+    try:
+        comparer = createComparer(col, job)
+
+        #Pass the messages and progress on to 'log', where an error stops the job
+        errors = []
+        comparer.echo.connect(log)
+        comparer.error.connect(errors.append)
+        comparer.progress.connect(lambda percentage, timeLeft, activity: log(f'{activity} {percentage}%'
+            + (f' ({timeLeft} seconds left)' if timeLeft != None else '')))
+
+        comparer.getNoteIDs()
+        comparer.run()
+        if len(errors) > 0:
+            raise ValueError(errors[0])
+    finally:
+        col.close()
+
+    writeQueue(comparer, queuePath)
+    return len(comparer.queue)
+
+def main(args = None):
+    parser = argparse.ArgumentParser(description = 'Compare the notes of an Anki collection without Anki and write the duplicates to a file.')
+    parser.add_argument('collection', help = 'the collection file (.anki2), which is opened read-only and may not be open in Anki')
+    parser.add_argument('job', help = 'the JSON file with the groups, fields, regexes and conditions to compare')
+    parser.add_argument('queue', help = 'the JSON file to write the duplicates to')
+    parser.add_argument('--quiet', action = 'store_true', help = 'only print errors')
+    args = parser.parse_args(args)
+
+    log = (lambda text: None) if args.quiet else (lambda text: print(text, file = sys.stderr))
+    try:
+        numRows = runJob(args.collection, args.job, args.queue, log)
+    except (OSError, ValueError, KeyError, TypeError, re.error, sqlite3.Error) as e:
+        print(f'Something went wrong: {e}', file = sys.stderr)
+        return 1
+
+    log(f'Found {numRows} duplicates, written to \'{args.queue}\'.')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#Import basic modules
+import os, datetime, statistics
+
+#Import all of the Qt GUI library
+from aqt.qt import *
+
+#Class for a dialog which shows the earlier runs of a comparison with the current configuration (see RunHistory.py),
+#so that it is visible straight away when comparisons have become slower, for example after the collection has grown or the add-on was updated
+class HistoryDialog(QDialog):
+
+    #The fraction by which a run may be slower than the runs before it, before it is marked as slower
+    slowerThreshold = 0.2
+
+    #'runs' are the records of the runs, starting with the latest one
+    def __init__(self, runs, parent, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.runs = runs
+
+        #Create a layout
+        self.setWindowTitle('Run history')
+        self.layout = QVBoxLayout(self)
+        self.setLayout(self.layout)
+
+        #Add the comparison of the latest run with the runs before it
+        self.summaryLabel = QLabel(self.createSummary(), self)
+        self.summaryLabel.setWordWrap(True)
+        self.layout.addWidget(self.summaryLabel)
+
+        #Add a table with a row for every run
+        columns = ['Date', 'Add-on version', 'Notes per group', 'Combinations', 'Duplicates',
+            'Total time', 'Loading', 'Comparing', 'Combinations / s', 'Peak memory', 'Compared in']
+        self.historyTable = QTableWidget(len(runs), len(columns), self)
+        self.historyTable.setHorizontalHeaderLabels(columns)
+        self.historyTable.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.historyTable.verticalHeader().setVisible(False)
+        self.layout.addWidget(self.historyTable)
+
+        for row, run in enumerate(runs):
+            previous = runs[row + 1] if row + 1 < len(runs) else None
+            phases = run['phases']
+            speed = self.speed(run)
+            cells = [
+                datetime.datetime.fromtimestamp(run['time']).strftime('%Y-%m-%d %H:%M'),
+                run['version'],
+                ' / '.join(str(size) for size in run['groupSizes']),
+                f"{run['combinations']:,}",
+                str(run['duplicates']),
+                f"{run['seconds']:.1f} s",
+                f"{phases.get('Loading notes', 0):.1f} s",
+                f"{phases.get('Comparing notes', 0):.1f} s",
+                f'{speed:,.0f}' if speed != None else '-',
+                f"{run['peakMemory'] / 1024 ** 2:.0f} MB" if run['peakMemory'] != None else '-',
+                run['engine']
+            ]
+            for column, text in enumerate(cells):
+                item = QTableWidgetItem(text)
+                if column > 1 and column < len(cells) - 1:
+                    item.setTextAlignment(int(Qt.AlignRight | Qt.AlignVCenter))
+                self.historyTable.setItem(row, column, item)
+
+            #Mark an update of the add-on and a run that was slower than the run before it
+            if previous != None and run['version'] != previous['version']:
+                self.historyTable.item(row, 1).setToolTip('The add-on was updated since the run before this one.')
+                self.historyTable.item(row, 1).setForeground(QBrush(QColor('darkorange')))
+            if previous != None and run['seconds'] > previous['seconds'] * (1 + self.slowerThreshold):
+                self.historyTable.item(row, 5).setToolTip(f"Slower than the run before this one ({previous['seconds']:.1f} s).")
+                self.historyTable.item(row, 5).setForeground(QBrush(QColor('red')))
+
+        self.historyTable.resizeColumnsToContents()
+        self.resize(min(self.historyTable.horizontalHeader().length() + 60, 1200), 400)
+
+        #Add a button to close the dialog
+        self.closeButton = QPushButton('Close', self)
+        self.layout.addWidget(self.closeButton)
+        self.closeButton.clicked.connect(self.accept)
+
+    #Method to return the number of combinations compared per second in a run, or 'None' when it is unknown
+    @staticmethod
+    def speed(run):
+        seconds = run['phases'].get('Comparing notes', 0)
+        return run['combinations'] / seconds if seconds > 0 else None
+
+    #Method to create a text comparing the latest run with the median of the runs before it
+    def createSummary(self):
+        if len(self.runs) == 0:
+            return 'There are no completed comparisons with the current settings yet.'
+        if len(self.runs) == 1:
+            return 'This is the only completed comparison with the current settings so far.'
+
+        latest = self.runs[0]
+        previous = self.runs[1:]
+        medianSeconds = statistics.median([run['seconds'] for run in previous])
+        text = (f"The latest comparison took {latest['seconds']:.1f} s, "
+            f"{self.change(latest['seconds'], medianSeconds)} the median of the {len(previous)} comparisons before it ({medianSeconds:.1f} s).")
+
+        #Compare the speed as well, which doesn't change when only the collection has grown
+        speeds = [self.speed(run) for run in previous if self.speed(run) != None]
+        if self.speed(latest) != None and len(speeds) > 0:
+            medianSpeed = statistics.median(speeds)
+            text += (f" It compared {self.speed(latest):,.0f} combinations per second, "
+                f"{self.change(self.speed(latest), medianSpeed)} the median of {medianSpeed:,.0f}.")
+
+        if any(run['version'] != latest['version'] for run in previous):
+            text += ' The add-on has been updated since some of these comparisons.'
+        return text
+
+    #Method to describe the change of a value compared to an earlier value
+    @staticmethod
+    def change(value, earlier):
+        if earlier == 0:
+            return 'more than' if value > 0 else 'about the same as'
+        percentage = (value - earlier) / earlier * 100
+        if abs(percentage) < 1:
+            return 'about the same as'
+        return f"{abs(percentage):.0f}% {'more than' if percentage > 0 else 'less than'}"
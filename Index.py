@@ -0,0 +1,292 @@
+#Import basic modules
+import os, re, zlib, math, random
+
+#Import local .py modules
+from . import Text
+
+#Characters which match an ASCII letter in a regular expression that ignores case,
+#but which are not turned into that letter by 'lower()'
+FOLD = str.maketrans({'İ': 'i', 'ı': 'i', 'ſ': 's', 'K': 'k'})
+
+#Function to turn a word into the key it is indexed by, so that words which match
+#when ignoring case (see 'Text.wordIn') end up with the same key
+def wordKey(word):
+    return word.translate(FOLD).lower()
+
+#Function to check if a value is a single ASCII word, which is the only kind of value 'Text.wordIn'
+#matches as a whole word and can therefore be looked up in a word index
+def isWord(value):
+    return value.isascii() and re.fullmatch(r'\w+', value) != None
+
+#Function to return the words of a value which are enclosed by other characters on both sides.
+#When the value is found somewhere in another value, these words must also be whole words of the other value
+def innerWords(value):
+    words = []
+    for match in re.finditer(r'\w+', value):
+        if match.start() > 0 and match.end() < len(value):
+            words.append(match.group(0))
+    return words
+
+#Class to index the notes of a group on a single key,
+#so the notes with a key equal to the one of a (partial) combination of notes can be returned at once.
+#The notes are referred to by their position in the note store of the group (see Store.py)
+class HashIndex:
+
+    #'probeKey' returns the key of a combination of notes and 'indexKey' the key of the note at a position in the group.
+    #Either can return 'None' when the note(s) can never match
+    def __init__(self, numNotes, probeKey, indexKey):
+        self.probeKey = probeKey
+        self.index = {}
+        for noteIndex in range(numNotes):
+            key = indexKey(noteIndex)
+            if key != None:
+                self.index.setdefault(key, []).append(noteIndex)
+
+    #Method to return the indices (in ascending order) of the notes that can match the combination of notes
+    def candidates(self, noteIndices):
+        key = self.probeKey(noteIndices)
+        if key == None:
+            return []
+        return self.index.get(key, [])
+
+#Class to index the notes of a group on the words of a field value for the 'in' operator
+#(see 'Node.inCompare'), so only notes which can contain a value are compared.
+#When 'indexRight' is 'True', the indexed field is the right operand and the word index is probed with the left value,
+#otherwise the indexed field is the left operand and the index is probed with the words of the right value.
+#The returned notes still have to be compared, since the index only excludes notes that can never match.
+class WordIndex:
+
+    #'probeValue' returns the value of a combination of notes and 'indexValue' the value of the note at a position in the group
+    def __init__(self, numNotes, probeValue, indexValue, indexRight):
+        self.probeValue = probeValue
+        self.indexRight = indexRight
+        self.index = {}
+        self.otherNotes = []
+
+        for noteIndex in range(numNotes):
+            value = indexValue(noteIndex)
+            if not isinstance(value, str):
+                continue
+
+            #Index the notes on every word of the right value
+            if indexRight:
+                for word in set(wordKey(w) for w in re.findall(r'\w+', value)):
+                    self.index.setdefault(word, []).append(noteIndex)
+
+            #Index the notes on the left value when it is a single word,
+            #all other left values can be found in any right value
+            elif isWord(value):
+                self.index.setdefault(wordKey(value), []).append(noteIndex)
+            else:
+                self.otherNotes.append(noteIndex)
+
+    #Method to return the indices (in ascending order) of the notes that can match the combination of notes,
+    #or 'None' when every note can match
+    def candidates(self, noteIndices):
+        value = self.probeValue(noteIndices)
+        if not isinstance(value, str):
+            return []
+
+        #When the right value is indexed, a single word must be one of its words
+        #and all inner words of multiple words must be present.
+        if self.indexRight:
+            if ' ' not in value:
+                if not isWord(value):
+                    return None
+                return self.index.get(wordKey(value), [])
+
+            words = innerWords(value)
+            if len(words) == 0:
+                return None
+            postings = [self.index.get(wordKey(w), []) for w in words]
+            return intersect(postings)
+
+        #When the left value is indexed, it must be one of the words of the right value
+        #(or be a value which isn't indexed)
+        else:
+            candidates = set(self.otherNotes)
+            for word in set(wordKey(w) for w in re.findall(r'\w+', value)):
+                candidates.update(self.index.get(word, []))
+            return sorted(candidates)
+
+#Class to index the notes of a group on the trigrams (substrings of three characters) of a field value
+#for the '>' operator (see 'Node.insideCompare'), so only notes which can contain a value are compared.
+#When 'indexRight' is 'True', the indexed field is the right operand and the index is probed with the left value,
+#otherwise the indexed field is the left operand and the index is probed with the trigrams of the right value.
+#The returned notes still have to be compared, since the index only excludes notes that can never match.
+class NgramIndex:
+
+    #Values shorter than this can't be looked up and every note is a candidate for them
+    n = 3
+
+    #The maximum number of note indices stored in all of the trigram lists together.
+    #When the indexed values are too big, the index isn't used and every note is a candidate
+    maxPostings = 5000000
+
+    #'probeValue' returns the value of a combination of notes and 'indexValue' the value of the note at a position in the group
+    def __init__(self, numNotes, probeValue, indexValue, indexRight):
+        self.probeValue = probeValue
+        self.indexRight = indexRight
+        self.index = {}
+        self.shortNotes = []
+        self.ngramCounts = {}
+
+        numPostings = 0
+        for noteIndex in range(numNotes):
+            value = indexValue(noteIndex)
+            if not isinstance(value, str):
+                continue
+
+            #Left values which are too short can be found in any right value
+            ngrams = self.ngrams(value)
+            if not indexRight and len(value) < self.n:
+                self.shortNotes.append(noteIndex)
+                continue
+
+            for ngram in ngrams:
+                self.index.setdefault(ngram, []).append(noteIndex)
+            self.ngramCounts[noteIndex] = len(ngrams)
+
+            #Stop indexing when the index becomes too big
+            numPostings += len(ngrams)
+            if numPostings > self.maxPostings:
+                self.index = None
+                break
+
+    #Method to return the set of trigrams of a value
+    def ngrams(self, value):
+        return set(value[i : i + self.n] for i in range(len(value) - self.n + 1))
+
+    #Method to return the indices (in ascending order) of the notes that can match the combination of notes,
+    #or 'None' when every note can match
+    def candidates(self, noteIndices):
+        if self.index == None:
+            return None
+
+        value = self.probeValue(noteIndices)
+        if not isinstance(value, str):
+            return []
+
+        #When the right value is indexed, it must contain every trigram of the left value
+        if self.indexRight:
+            if len(value) < self.n:
+                return None
+            return intersect([self.index.get(ngram, []) for ngram in self.ngrams(value)])
+
+        #When the left value is indexed, all of its trigrams must be trigrams of the right value
+        else:
+            counts = {}
+            for ngram in self.ngrams(value):
+                for noteIndex in self.index.get(ngram, []):
+                    counts[noteIndex] = counts.get(noteIndex, 0) + 1
+            candidates = [i for i, count in counts.items() if count == self.ngramCounts[i]]
+            candidates.extend(self.shortNotes)
+            return sorted(candidates)
+
+#Class to index the notes of a group on MinHash signatures of the shingles of a field value (see 'Text.shingles')
+#for the '~' operator (see 'Node.similarCompare'), so only notes which are likely to be similar enough are compared.
+#A signature consists of 'bands * rows' numbers, the minimum hash of the shingles that fall into each of as many bins
+#(bins without any shingles take the number of another bin that has one), so that two values have the same number
+#in a bin with a chance of about the Jaccard similarity of their shingles. Notes are candidates when all numbers of
+#at least one band are the same, which happens for a pair of values with a similarity equal to the threshold with a chance of 'recall'.
+#Both operands have the same role, so it doesn't matter which of them is indexed.
+#The returned notes still have to be compared, and notes that are similar enough are rarely (but not never) left out
+class MinHashIndex:
+
+    #The chance that a pair of values with a similarity equal to the threshold becomes a candidate
+    #and the maximum number of numbers in a signature
+    recall = 0.99
+    maxHashes = 128
+
+    #'probeValue' returns the value of a combination of notes and 'indexValue' the value of the note at a position in the group
+    def __init__(self, numNotes, probeValue, indexValue, indexRight, threshold):
+        self.probeValue = probeValue
+        self.bands, self.rows = self.__class__.bandsAndRows(threshold, self.recall, self.maxHashes)
+        self.numHashes = self.bands * self.rows
+        self.donors = [random.Random(binIndex).sample(range(self.numHashes), self.numHashes) for binIndex in range(self.numHashes)]
+        self.shingleHashes = {}
+        self.index = {}
+        self.lastValue = None
+        self.lastCandidates = None
+
+        #The band keys of values that occur more than once are only computed once
+        valueKeys = {}
+        for noteIndex in range(numNotes):
+            value = indexValue(noteIndex)
+            if not isinstance(value, str):
+                continue
+            keys = valueKeys.get(value)
+            if keys == None:
+                keys = valueKeys[value] = self.bandKeys(value)
+            for key in keys:
+                self.index.setdefault(key, []).append(noteIndex)
+
+    #Method to return the number of bands and the number of rows per band for a threshold,
+    #using as many rows as possible while a pair of values with a similarity equal to the threshold
+    #still becomes a candidate with a chance of 'recall' and the signature has at most 'maxHashes' numbers
+    @staticmethod
+    def bandsAndRows(threshold, recall, maxHashes):
+        for rows in range(maxHashes, 0, -1):
+            rowsMatch = threshold ** rows
+            if rowsMatch >= 1:
+                return 1, rows
+            if math.log1p(-rowsMatch) == 0:
+                continue
+            bands = math.ceil(math.log1p(-recall) / math.log1p(-rowsMatch))
+            if bands * rows <= maxHashes:
+                return bands, rows
+        return maxHashes, 1
+
+    #Method to return the hash of a shingle, which is the same in every process (unlike 'hash')
+    #and mixed so that its lowest and highest bits are spread evenly
+    def shingleHash(self, shingle):
+        shingleHash = self.shingleHashes[shingle] = zlib.crc32(shingle.encode('utf-8')) * 0x9E3779B1 & 0xFFFFFFFF
+        return shingleHash
+
+    #Method to return the key of every band of the signature of a value, or no keys when the value has no shingles
+    def bandKeys(self, value):
+        shingles = Text.shingles(value)
+        if len(shingles) == 0:
+            return []
+
+        #Put the hash of every shingle in a bin, from the highest to the lowest hash so that every bin keeps its lowest one
+        shingleHashes = self.shingleHashes
+        hashes = [shingleHashes.get(shingle) for shingle in shingles]
+        if None in hashes:
+            hashes = [shingleHashes[shingle] if shingle in shingleHashes else self.shingleHash(shingle) for shingle in shingles]
+        numHashes = self.numHashes
+        bins = {shingleHash * numHashes >> 32: shingleHash for shingleHash in sorted(hashes, reverse = True)}
+
+        #Fill every empty bin with the number of the first bin which isn't empty in a fixed random order of bins for that bin
+        isFull = bins.__contains__
+        signature = [bins[binIndex] if binIndex in bins else bins[next(filter(isFull, donors))] for binIndex, donors in enumerate(self.donors)]
+
+        rows = self.rows
+        return [hash((band,) + tuple(signature[band * rows : (band + 1) * rows])) for band in range(self.bands)]
+
+    #Method to return the indices (in ascending order) of the notes that share the numbers of a band with the value of the combination of notes.
+    #The candidates of the last value are remembered, since the value of an earlier group stays the same for several combinations
+    def candidates(self, noteIndices):
+        value = self.probeValue(noteIndices)
+        if not isinstance(value, str):
+            return []
+        if value == self.lastValue:
+            return self.lastCandidates
+
+        candidates = set()
+        for key in self.bandKeys(value):
+            candidates.update(self.index.get(key, []))
+        self.lastValue = value
+        self.lastCandidates = sorted(candidates)
+        return self.lastCandidates
+
+#Function to return the common note indices of several lists of note indices in ascending order
+def intersect(lists):
+    lists = sorted(lists, key = len)
+    result = lists[0]
+    for other in lists[1:]:
+        if len(result) == 0:
+            break
+        other = set(other)
+        result = [i for i in result if i in other]
+    return result
@@ -0,0 +1,103 @@
+#Import basic modules
+import os
+
+#Import local .py modules
+from . import Index
+intersect = Index.intersect
+
+#Class to find duplicate note combinations between groups of loaded notes.
+#Instead of visiting every possible combination, every group after the first one can have indexes (see Index.py)
+#which return only the notes that can match the notes chosen from the groups before it.
+#The combinations are returned in the same order as a nested loop over all of the groups (in the chosen order) would return them.
+#A (partial) combination is a list with the position of the chosen note in the note store (see Store.py) of every group
+#('None' for the groups which haven't been chosen yet).
+class Join:
+
+    #'indexes' contains for every group a list of indexes, which all have a method 'candidates'
+    #returning the positions of the notes that can extend a (partial) combination in ascending order
+    #(or 'None' when every note of the group can).
+    #'condition' is an optional function which every finished combination must also satisfy.
+    #'order' is the order in which the notes of the groups are chosen (by default the order of the groups),
+    #the indexes must have been created for the same order (see 'Planner.createIndexes').
+    #'allowed' optionally contains for every group a function which returns if the note at a position may be used (or 'None')
+    def __init__(self, stores, indexes, condition = None, order = None, allowed = None):
+        self.stores = stores
+        self.indexes = indexes
+        self.condition = condition
+        self.groupNum = len(stores)
+        self.order = list(range(self.groupNum)) if order == None else order
+        self.allowed = [None] * self.groupNum if allowed == None else allowed
+
+    #Method to return the positions of the notes in a group that can extend the given (partial) combination
+    def candidates(self, groupIndex, noteIndices):
+        postings = []
+        for index in self.indexes[groupIndex]:
+            candidates = index.candidates(noteIndices)
+            if candidates != None:
+                postings.append(candidates)
+
+        #When no index restricts the notes, every note of the group is a candidate
+        if len(postings) == 0:
+            candidates = range(len(self.stores[groupIndex]))
+        elif len(postings) == 1:
+            candidates = postings[0]
+        else:
+            candidates = intersect(postings)
+
+        allowed = self.allowed[groupIndex]
+        if allowed != None:
+            return [i for i in candidates if allowed(i)]
+        return candidates
+
+    #Generator to return every combination of notes (one per group) with matching keys which satisfies the condition,
+    #as a tuple with the position of the note in every group.
+    #Combinations which contain the same note more than once are skipped.
+    #Only the given positions of the first group in the order are used (by default the notes from 'start' up to 'end').
+    #'progress' is called with the number of notes of the first group that have been processed
+    #and when 'stopped' returns 'True' the generator returns early.
+    def combinations(self, progress = None, stopped = None, start = 0, end = None, firstNotes = None):
+        firstGroup = self.order[0]
+        if firstNotes == None:
+            end = len(self.stores[firstGroup]) if end == None else end
+            firstNotes = range(start, end)
+
+        noteIndices = [None] * self.groupNum
+        allowed = self.allowed[firstGroup]
+        for i, noteIndex in enumerate(firstNotes):
+            if allowed == None or allowed(noteIndex):
+                noteIndices[firstGroup] = noteIndex
+                yield from self.extend(noteIndices, 1)
+
+            if progress != None:
+                progress(i + 1)
+            if stopped != None and stopped():
+                return
+
+    #Recursive generator to extend a partial combination with the candidates of the group at 'depth' in the order.
+    #The next note is set in place, so no new list is created for every candidate
+    def extend(self, noteIndices, depth):
+        groupIndex = self.order[depth]
+        candidates = self.candidates(groupIndex, noteIndices)
+
+        #When this is the last group, return the finished combinations
+        if depth == self.groupNum - 1:
+            chosen = self.order[:depth]
+            noteIDs = set(self.stores[g].noteIDs[noteIndices[g]] for g in chosen)
+            if len(noteIDs) != len(chosen):
+                return
+            groupNoteIDs = self.stores[groupIndex].noteIDs
+
+            for noteIndex in candidates:
+                if groupNoteIDs[noteIndex] in noteIDs:
+                    continue
+                noteIndices[groupIndex] = noteIndex
+                if self.condition == None or self.condition(noteIndices):
+                    yield tuple(noteIndices)
+            noteIndices[groupIndex] = None
+
+        #Otherwise add every candidate and continue with the next group
+        else:
+            for noteIndex in candidates:
+                noteIndices[groupIndex] = noteIndex
+                yield from self.extend(noteIndices, depth + 1)
+            noteIndices[groupIndex] = None
@@ -0,0 +1,51 @@
+#Import basic modules
+import os, json, time
+
+#Class to remember the result of the last completed comparison with a certain configuration,
+#so that a later comparison with the same configuration only has to compare the notes
+#which have been added or changed since (see 'Comparer.findChangedDuplicates')
+class LastRun:
+
+    #The number of days after which the results of configurations that haven't been used are removed
+    #and the maximum number of results that are kept (of the configurations that have been used most recently)
+    maxDays = 60
+    maxFiles = 10
+
+    #'startTime' is the time (in seconds) the comparison started, notes modified at or after this time have changed since.
+    #'usn' is the update sequence number of the collection when the comparison started: notes that have been synced in since have a usn at or above it,
+    #even when they were modified on another device before 'startTime', and notes changed since the last sync have a usn of -1.
+    #'noteIDs' contains the IDs of the notes of every group and 'duplicates' the note IDs of every duplicate combination
+    def __init__(self, startTime, usn, noteIDs, duplicates):
+        self.startTime = startTime
+        self.usn = usn
+        self.noteIDs = noteIDs
+        self.duplicates = duplicates
+
+    #Method to load the last run from a file, or return 'None' when there is no (valid) last run
+    #(which includes the files of older versions without a usn, so that the next comparison compares all notes)
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, 'r', encoding = 'utf-8') as file:
+                data = json.load(file)
+            return cls(data['startTime'], data['usn'], data['noteIDs'], data['duplicates'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    #Method to return whether a note with the given modification time and usn has changed since the last run
+    def changed(self, mod, usn):
+        return mod >= self.startTime or usn == -1 or usn >= self.usn
+
+    #Method to save the last run to a file and remove the files of last runs in the same folder that haven't been used for a while
+    #or that are more than 'maxFiles' files ago
+    def save(self, path):
+        with open(path + '.tmp', 'w', encoding = 'utf-8') as file:
+            json.dump({'startTime': self.startTime, 'usn': self.usn, 'noteIDs': self.noteIDs, 'duplicates': self.duplicates}, file, separators = (',', ':'))
+        os.replace(path + '.tmp', path)
+
+        folder = os.path.dirname(path)
+        others = [os.path.join(folder, name) for name in os.listdir(folder) if name.startswith('lastRun-') and name.endswith('.json')]
+        others = sorted([other for other in others if other != path], key = os.path.getmtime, reverse = True)
+        for i, other in enumerate(others):
+            if i >= self.maxFiles - 1 or os.path.getmtime(other) < time.time() - self.maxDays * 24 * 60 * 60:
+                os.remove(other)
@@ -3,19 +3,19 @@
 #-enable tree construction general Exception
 
 #Import basic modules
-import os, datetime, re
+import os, datetime, re, html
 
 #Import the main window object (mw) from aqt
 from aqt import mw
 
-#Import the "show info" tool from utils.py
-from aqt.utils import showInfo
+#Import the "show info" and "ask user" tools from utils.py
+from aqt.utils import showInfo, showWarning, askUser
 
 #Import all of the Qt GUI library
 from aqt.qt import *
 
 #Import local .py modules
-from . import GroupWindow, Comparer, Utils, QueueDialog
+from . import GroupWindow, Comparer, Utils, QueueDialog, HistoryDialog
 echo = Utils.echo
 
 #Class which will run a dialog and create a Comparer object when instantiated
@@ -72,10 +72,14 @@ class Dialog(QDialog):
                         <li>'<code>in</code>': This means that the field left from the [operator] must be present somewhere in the field to the right for the condition to be '<code>True</code>'. 
                         If the left field is a single word it must also be present as a single word in the right field. Text in quotes must be on the left.</li>
                         <li>'<code>></code>': This means the same as <code>in</code>, but the left field doesn't have to be present as a single word in the right field, but can also be part of a word.</li>
+                        <li>'<code>~0.8</code>': This means that both fields must be similar: at least the given fraction (above 0 and at most 1) of the groups of three characters
+                        of both fields together must be present in both of them, ignoring case, HTML and extra white space. Notes with almost the same text are found quickly,
+                        but very rarely a pair of similar notes can be missed. Neither field can be a regular expression.</li>
                     </ul>
                 <div><b>Example 1</b>: '<code>G1F1 in G2F1</code>' means that field 1 of group 1 needs to be present in field 1 of group 2.</div>
                 <div><b>Example 2</b>: '<code>G1F1 = 'ball'</code>' means that field 1 of group 1 match exactly match 'ball'.</div>
                 <div><b>Example 3</b>: '<code>'ball' > G1F1</code>' means that the letters 'ball' need to be present in field 1 of group 1, so it can match either 'football' or 'basketball'.</div>
+                <div><b>Example 4</b>: '<code>G1F1 ~0.8 G2F1</code>' means that field 1 of group 1 and field 1 of group 2 must be at least 80% similar, so 'The cat sat on the mat' matches 'The cats sat on the mat'.</div>
             </li>
             <li>Any number of conditions can be strung together by using:
                 <ul>
@@ -118,14 +122,59 @@ class Dialog(QDialog):
         self.conditionEdit.setVisible(False)
         self.conditionEdit.textChanged.connect(self.enterCondition)
 
+        #Add a spin box to choose the number of processes the notes are compared in
+        self.workersLabel = QLabel('Number of processes to compare notes in:', self)
+        self.workersBox = QSpinBox(self)
+        self.workersBox.setRange(1, os.cpu_count() or 1)
+        self.workersBox.setValue(self.Comparer.workers)
+        self.workersBox.valueChanged.connect(self.selectWorkers)
+        self.workersBox.setToolTip('''
+        <p>When more than one process is chosen, the notes of the first group are split into parts which are compared in separate processes at the same time.
+        This can make comparing large groups a lot faster, but every process needs its own copy of the loaded notes.
+        The duplicates are the same as when comparing the notes in a single process.
+        <br>The packaged builds of Anki can't start these processes, so there the notes are always compared in a single process.
+        Comparing without Anki (see 'Headless.py') can use several processes.</p>''')
+        self.workersLayout = QHBoxLayout()
+        self.workersLayout.addWidget(self.workersLabel)
+        self.workersLayout.addWidget(self.workersBox)
+        self.workersLayout.addStretch()
+        self.layout.addLayout(self.workersLayout)
+
+        #Add a check box to only compare the notes that have changed since the last comparison
+        self.incrementalCheckBox = QCheckBox('Only compare notes changed since the last comparison', self)
+        self.layout.addWidget(self.incrementalCheckBox)
+        self.incrementalCheckBox.setChecked(self.Comparer.incremental)
+        self.incrementalCheckBox.stateChanged.connect(self.toggleIncremental)
+        self.incrementalCheckBox.setToolTip('''
+        <p>When enabled and the groups have been compared before with exactly the same settings and this option enabled, only the notes which have been added to the groups
+        or edited since then are compared to the other notes. The duplicates of the last comparison are kept when none of their notes have changed.
+        The duplicates are the same as when comparing all of the notes, but the notes are always compared in a single process.</p>''')
+
+        #Add a check box to record where the time of a comparison goes, which is shown in the run statistics panel afterwards
+        self.profileCheckBox = QCheckBox('Record run statistics', self)
+        self.layout.addWidget(self.profileCheckBox)
+        self.profileCheckBox.setChecked(self.Comparer.profile)
+        self.profileCheckBox.stateChanged.connect(self.toggleProfile)
+        self.profileCheckBox.setToolTip('''
+        <p>When enabled, the time spent in every phase of the comparison (such as loading the notes, processing their fields
+        and comparing them) is recorded. In advanced mode, the number of times every condition is evaluated, how often it is '<code>True</code>'
+        and the time spent on it are recorded as well. Conditions that are solved by looking up notes with matching fields are never evaluated.
+        This makes the comparison a little slower, so only enable it to find out why a comparison is slow.</p>''')
+
         #Add compare button
         self.compareButton = QPushButton('Compare groups', self)
         self.layout.addWidget(self.compareButton)
         self.compareButton.clicked.connect(self.compare)
         self.compareButton.setToolTip('This can take from 10 min up till 1h+ for decks bigger than 1000 notes.')
 
+        #Add a button to show the earlier runs of the comparison with the current settings
+        self.historyButton = QPushButton('Show run history', self)
+        self.layout.addWidget(self.historyButton)
+        self.historyButton.clicked.connect(self.showHistory)
+        self.historyButton.setToolTip('Show how long the earlier comparisons with the current settings took, to see if they have become slower.')
+
         #Add invisible button to show the dialog window
-        self.queueButton = QPushButton('Show duplicates (this can take a while)', self)
+        self.queueButton = QPushButton('Show duplicates', self)
         self.layout.addWidget(self.queueButton)
         self.queueButton.clicked.connect(self.showQueue)
         self.queueButton.setVisible(False)
@@ -145,6 +194,15 @@ class Dialog(QDialog):
         self.timeLeftLabel = QLabel('', self)
         self.layout.addWidget(self.timeLeftLabel)
         self.timeLeftLabel.setVisible(False)
+
+        #Add an invisible panel to show the run statistics of the last comparison
+        self.statisticsBox = QGroupBox('Run statistics', self)
+        self.statisticsLayout = QVBoxLayout(self.statisticsBox)
+        self.statisticsLabel = QLabel('', self.statisticsBox)
+        self.statisticsLabel.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        self.statisticsLayout.addWidget(self.statisticsLabel)
+        self.layout.addWidget(self.statisticsBox)
+        self.statisticsBox.setVisible(False)
         
         #Create a thread and add the Comparer object to it
         self.thread = QThread(self)
@@ -169,6 +227,13 @@ class Dialog(QDialog):
         #Re-enable all GUI elements and hide/reset the progress report bar + time left label when finished
         self.thread.finished.connect(lambda: self.reset())
 
+        #When the run statistics have been recorded, show them
+        self.Comparer.statistics.connect(self.showStatistics)
+
+        #While comparing, show the duplicates that have been found so far
+        self.Comparer.duplicatesFound.connect(self.showFoundDuplicates)
+        self.queueDialog = None
+
         #When all actions have been performed but the queue is not empty yet, reopen the queue dialog
         self.Comparer.actionsDone.connect(lambda: self.showQueue() if len(self.Comparer.queue) > 0 else None) 
 
@@ -209,6 +274,18 @@ class Dialog(QDialog):
         conditions = self.conditionEdit.toPlainText()
         self.Comparer.conditionString = conditions
 
+    #Method trigger to save the chosen number of processes
+    def selectWorkers(self, workers):
+        self.Comparer.workers = workers
+
+    #Method trigger to toggle only comparing the changed notes
+    def toggleIncremental(self):
+        self.Comparer.incremental = self.incrementalCheckBox.isChecked()
+
+    #Method trigger to toggle recording the run statistics
+    def toggleProfile(self):
+        self.Comparer.profile = self.profileCheckBox.isChecked()
+
     #Method trigger to compare all of the cards between the group
     def compare(self):
         
@@ -218,7 +295,7 @@ class Dialog(QDialog):
                 self.Comparer.conditionTree.setString(self.Comparer.conditionString)
                 self.Comparer.conditionTree.createChildren()
             except re.error as e:
-                self.error(e)
+                self.warn(e)
                 return
             # except Exception:
             #     self.error('Something went wrong')
@@ -230,6 +307,20 @@ class Dialog(QDialog):
         # ]
         # echo(f'Answer:{self.Comparer.conditionTree.solve(notes)}')
 
+        #Close the queue of the previous comparison
+        if self.queueDialog != None:
+            self.queueDialog.reject()
+            self.queueDialog = None
+
+        #When an earlier comparison with the same settings was stopped before it was done, ask whether to resume it
+        self.Comparer.resume = False
+        if not self.Comparer.incremental and os.path.exists(self.Comparer.getCheckpointPath()):
+            self.Comparer.resume = askUser('An earlier comparison with the same settings was stopped before it was done.\n'
+                'Do you want to resume it? It is started over anyway when any of the notes have changed since.', self)
+
+        #Hide the run statistics of the previous comparison
+        self.statisticsBox.setVisible(False)
+
         #Retrieve all of the note ids
         self.Comparer.getNoteIDs()
         
@@ -260,7 +351,12 @@ class Dialog(QDialog):
         self.regexCheckBox.setEnabled(boolean)
         self.conditionLabel.setEnabled(boolean)
         self.conditionEdit.setEnabled(boolean)
+        self.workersLabel.setEnabled(boolean)
+        self.workersBox.setEnabled(boolean)
+        self.incrementalCheckBox.setEnabled(boolean)
+        self.profileCheckBox.setEnabled(boolean)
         self.compareButton.setEnabled(boolean)
+        self.historyButton.setEnabled(boolean)
         self.queueButton.setEnabled(boolean)
 
         #Disable all widgets per group window
@@ -272,6 +368,11 @@ class Dialog(QDialog):
         self.errorShown = True
         echo(msg)
 
+    #Method to show a warning to the user outside of a comparison, which unlike 'error'
+    #doesn't stop the queue of the next comparison from being shown
+    def warn(self, msg):
+        showWarning(str(msg))
+
     #Method to reset the GUI
     def reset(self):
         self.setEnabledAll(True)
@@ -291,8 +392,12 @@ class Dialog(QDialog):
         self.queueButton.setVisible(False)
 
         #When an error causes the comparison to end, don't show the queue
+        #and close the duplicates shown while comparing
         if self.errorShown:
             self.errorShown = False
+            if self.queueDialog != None:
+                self.queueDialog.reject()
+                self.queueDialog = None
             return
 
         #Retrieve the queue
@@ -308,9 +413,63 @@ class Dialog(QDialog):
             #Show the show duplicates button when there are results
             self.queueButton.setVisible(True)
 
-            #Create and execute the new dialog with this dialog as parent
-            dialog = QueueDialog.QueueDialog(self.Comparer, self)
-            dialog.exec()
+            #When the duplicates are still shown from while comparing, show the rest of them and allow performing the actions
+            if self.queueDialog != None and self.queueDialog.isVisible():
+                self.queueDialog.addRows(len(queue))
+                self.queueDialog.setRunning(False)
+                self.queueDialog.raise_()
+                self.queueDialog.activateWindow()
+
+            #Otherwise create and execute the new dialog with this dialog as parent
+            else:
+                self.queueDialog = None
+                dialog = QueueDialog.QueueDialog(self.Comparer, self)
+                dialog.exec()
+
+    #Method to show the duplicates found so far while comparing ('numRows' is the number of rows in the queue).
+    #The queue dialog is opened when the first duplicates are found and is not modal, so that the comparison can still be followed
+    def showFoundDuplicates(self, numRows):
+        if not self.thread.isRunning():
+            return
+        if self.queueDialog == None:
+            self.queueDialog = QueueDialog.QueueDialog(self.Comparer, self, running = True)
+            self.queueDialog.show()
+        else:
+            self.queueDialog.addRows(numRows)
+
+    #Method to show the earlier runs of the comparison with the current settings
+    def showHistory(self):
+        if self.Comparer.advancedMode:
+            try:
+                self.Comparer.conditionTree.setString(self.Comparer.conditionString)
+            except re.error as e:
+                self.warn(e)
+                return
+        dialog = HistoryDialog.HistoryDialog(self.Comparer.getHistory(), self)
+        dialog.exec()
+
+    #Method to show the run statistics recorded during the comparison (see 'Profiler.statistics'):
+    #a table with the time and number of calls of every phase and in advanced mode a table with the evaluations of every condition
+    def showStatistics(self, statistics):
+        text = f"<b>Total time:</b> {statistics['seconds']:.3f} s<br><table cellspacing='0' cellpadding='3'>"
+        text += '<tr><th align="left">Phase</th><th align="right">Calls</th><th align="right">Time (s)</th><th align="right">Share</th></tr>'
+        for phase in statistics['phases']:
+            share = phase['seconds'] / statistics['seconds'] * 100 if statistics['seconds'] > 0 else 0
+            text += (f"<tr><td>{phase['name']}</td><td align='right'>{phase['calls']}</td>"
+                f"<td align='right'>{phase['seconds']:.3f}</td><td align='right'>{share:.1f}%</td></tr>")
+        text += '</table>'
+
+        if len(statistics['conditions']) > 0:
+            text += "<br><table cellspacing='0' cellpadding='3'>"
+            text += '<tr><th align="left">Condition</th><th align="right">Evaluations</th><th align="right">True</th><th align="right">Time (s)</th></tr>'
+            for condition in statistics['conditions']:
+                trueRate = f"{condition['trueRate'] * 100:.1f}%" if condition['trueRate'] != None else '-'
+                text += (f"<tr><td><code>{html.escape(condition['condition'])}</code></td><td align='right'>{condition['evaluations']}</td>"
+                    f"<td align='right'>{trueRate}</td><td align='right'>{condition['seconds']:.3f}</td></tr>")
+            text += '</table>'
+
+        self.statisticsLabel.setText(text)
+        self.statisticsBox.setVisible(True)
 
     #Method to safely clean up after closing the main dialog and any running threads
     def close(self):
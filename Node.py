@@ -3,8 +3,8 @@
 import os, re
 
 #Import local .py modules
-from . import Utils
-echo = Utils.echo
+from . import Text, Store
+ABSENT = Store.ABSENT
 
 #Class to build a conditional tree to compare notes
 class Node:
@@ -22,11 +22,12 @@ class Node:
         self.rightOperand = None
         self.rightValue = None
         self.solveMethod = None
+        self.threshold = None
     
     #Function to set a string
     def setString(self, string):
         try:
-            self.string = Utils.removeBrackets(string.replace('\n', ' ').replace('\t', ' '))
+            self.string = Text.removeBrackets(string.replace('\n', ' ').replace('\t', ' '))
         except re.error as e:
             raise e
 
@@ -86,8 +87,9 @@ class Node:
             if string in ['and', 'or']:
                 return
 
-            #Split the current value into left operand, operator and right operand
-            stringSplit = [i for i in re.split(r'(=)|(in)|(>)', string) if i not in [None, '']]
+            #Split the current value into left operand, operator and right operand,
+            #where the '~' operator is followed by its threshold (f.e. '~0.8')
+            stringSplit = [i for i in re.split(r'(~\s*[\d.]+)|(=)|(in)|(>)', string) if i not in [None, '']]
 
             #When the length isn't 3 raise an error
             if len(stringSplit) != 3:
@@ -135,6 +137,23 @@ class Node:
                 #Save the solve method
                 self.solveMethod = self.insideCompare
 
+            elif stringSplit[1].startswith('~'):
+
+                #Neither operand can be a regular expression
+                if leftType == 'regex' or rightType == 'regex':
+                    raise re.error(f"Neither the left nor the right part of \"{string}\" can be a regular expression.")
+
+                #The threshold must be a number above 0 and at most 1
+                try:
+                    self.threshold = float(stringSplit[1][1:])
+                except ValueError:
+                    self.threshold = None
+                if self.threshold == None or not 0 < self.threshold <= 1:
+                    raise re.error(f'The threshold of "{string}" must be a number above 0 and at most 1 (f.e. \'~0.8\').')
+
+                #Save the solve method
+                self.solveMethod = self.similarCompare
+
             else:
                 raise re.error(f'"{string}" is not a valid condition.')
 
@@ -162,8 +181,13 @@ class Node:
             raise re.error(f'"{operand}" is not a valid value, regular expression or field reference.')
 
 
-    #Recursive tree method to solve child conditions based on the notes given
-    def solve(self, notes):
+    #Recursive tree method to solve child conditions based on the notes given.
+    #Any node in 'satisfied' is already known to be 'True' for these notes and is not solved again
+    def solve(self, notes, satisfied = ()):
+
+        #Return 'True' when the condition has already been satisfied
+        if self in satisfied:
+            return True
 
         #Return the correct value when the node has no children 
         numChildren = len(self.children)
@@ -180,10 +204,10 @@ class Node:
         #When the node has children, solve their values from left to right
         #and return the total result
         else:
-            totalCondition = self.children[0].solve(notes)
+            totalCondition = self.children[0].solve(notes, satisfied)
             currentOperator = ''
             for i in range(1, numChildren):
-                newCondition = self.children[i].solve(notes)
+                newCondition = self.children[i].solve(notes, satisfied)
 
                 #When a child is an operator save it temporarily
                 if newCondition in ['and', 'or']:
@@ -204,26 +228,308 @@ class Node:
             #Return the total condition
             return totalCondition
 
-    #Method to retrieve a field value from a set of notes
+    #Method to compile this node into a single function which solves it for a combination of notes in the note stores (see Store.py),
+    #given as a list with the position of the note in the store of every group.
+    #It returns the same as 'solve', but field references and regular expressions are resolved only once,
+    #equal fields are compared by their value IDs, conditions without any fields are solved right away
+    #and the conditions are evaluated from left to right only as far as needed. Any node in 'satisfied' is already known to be 'True'.
+    #When a profiler is given (see Profiler.py), the evaluations of the elemental conditions are recorded
+    def compile(self, stores, satisfied = (), profiler = None):
+        function, constant = self.compileNode(stores, satisfied, profiler)
+        if function == None:
+            return lambda noteIndices: constant
+        return function
+
+    #Recursive method to compile this node, which returns either (function, None)
+    #or (None, value) when the node always has the same value
+    def compileNode(self, stores, satisfied, profiler = None):
+        if self in satisfied:
+            return None, True
+
+        #Compile the elemental condition
+        if len(self.children) == 0:
+            function, constant = self.compileCondition(stores)
+            if function != None and profiler != None:
+                function = profiler.timedCondition(self, function)
+            return function, constant
+
+        #When the operators are used incorrectly, solve the node as usual so that the same error is raised
+        if not self.hasValidOperators():
+            return lambda noteIndices: self.solve([s.note(i) for s, i in zip(stores, noteIndices)], satisfied), None
+
+        #Combine the children from left to right
+        function, constant = self.children[0].compileNode(stores, satisfied, profiler)
+        for i in range(1, len(self.children), 2):
+            operator = self.children[i].string
+            nextFunction, nextConstant = self.children[i + 1].compileNode(stores, satisfied, profiler)
+            function, constant = self.__class__.combine(operator, function, constant, nextFunction, nextConstant)
+        return function, constant
+
+    #Method to combine two compiled conditions with an operator the same way 'solve' combines them
+    @staticmethod
+    def combine(operator, function, constant, nextFunction, nextConstant):
+
+        #When the current value is always the same, the result is either that value or the next condition
+        if function == None:
+            if (operator == 'and' and not constant) or (operator == 'or' and constant):
+                return None, constant
+            return nextFunction, nextConstant
+
+        #When the next value is always the same, the result is either the current condition or that value
+        if nextFunction == None:
+            if (operator == 'and' and nextConstant) or (operator == 'or' and not nextConstant):
+                return function, None
+            return None, nextConstant
+
+        if operator == 'and':
+            return lambda noteIndices: function(noteIndices) and nextFunction(noteIndices), None
+        return lambda noteIndices: function(noteIndices) or nextFunction(noteIndices), None
+
+    #Method to compile an elemental condition, which returns (function, None) or (None, value) (see 'compileNode')
+    def compileCondition(self, stores):
+
+        #A condition without any fields always has the same value
+        if not isinstance(self.leftValue, tuple) and not isinstance(self.rightValue, tuple):
+            return None, self.solveMethod([])
+
+        left = self.__class__.compileFieldValue(self.leftValue, stores)
+        right = self.__class__.compileFieldValue(self.rightValue, stores)
+
+        #When a field reference can never refer to a field, the condition is always 'False'
+        if left == None or right == None:
+            return None, False
+
+        #Two fields are equal when they have the same value ID
+        if self.solveMethod == self.equalCompare and isinstance(self.leftValue, tuple) and isinstance(self.rightValue, tuple):
+            leftID = self.__class__.compileFieldID(self.leftValue, stores)
+            rightID = self.__class__.compileFieldID(self.rightValue, stores)
+            def function(noteIndices):
+                l = leftID(noteIndices)
+                return l != ABSENT and l == rightID(noteIndices)
+
+        elif self.solveMethod == self.equalCompare:
+            def function(noteIndices):
+                l = left(noteIndices)
+                r = right(noteIndices)
+                return not (isinstance(l, bool) or isinstance(r, bool)) and l == r
+
+        elif self.solveMethod == self.inCompare:
+            wordIn = Text.wordIn
+            def function(noteIndices):
+                l = left(noteIndices)
+                r = right(noteIndices)
+                if isinstance(l, bool) or isinstance(r, bool):
+                    return False
+                return l in r if ' ' in l else wordIn(l, r)
+
+        elif self.solveMethod == self.insideCompare:
+            def function(noteIndices):
+                l = left(noteIndices)
+                r = right(noteIndices)
+                return not (isinstance(l, bool) or isinstance(r, bool)) and l in r
+
+        elif self.solveMethod == self.similarCompare:
+            similar = Text.similar
+            threshold = self.threshold
+            def function(noteIndices):
+                l = left(noteIndices)
+                r = right(noteIndices)
+                return not (isinstance(l, bool) or isinstance(r, bool)) and similar(l, r, threshold)
+
+        elif self.solveMethod == self.equalRegexCompare:
+            fullmatch = re.compile(self.rightValue).fullmatch
+            def function(noteIndices):
+                l = left(noteIndices)
+                return not isinstance(l, bool) and fullmatch(l) != None
+
+        else:
+            search = re.compile(self.leftValue).search
+            def function(noteIndices):
+                r = right(noteIndices)
+                return not isinstance(r, bool) and search(r) != None
+
+        return function, None
+
+    #Method to compile a field reference into a function which retrieves its value from a combination of notes in the note stores
+    #the same way as 'getFieldValue' does, except that a normalized field returns its normalized value (see 'NoteStore.keys').
+    #Returns 'None' when the field reference can never refer to a field
+    @staticmethod
+    def compileFieldValue(fieldReference, stores):
+
+        #When the value is not a field reference, it is always the same
+        if not isinstance(fieldReference, tuple):
+            return lambda noteIndices: fieldReference
+
+        groupIndex = int(fieldReference[0]) - 1
+        if groupIndex < 0 or groupIndex >= len(stores):
+            return None
+        noteValue = Node.compileNoteFieldValue(fieldReference, stores[groupIndex])
+        if noteValue == None:
+            return None
+        return lambda noteIndices: noteValue(noteIndices[groupIndex])
+
+    #Method to compile a field reference into a function which retrieves the value ID (see Store.py) of the field
+    #from a combination of notes in the note stores. Returns 'None' when the field reference can never refer to a field
+    @staticmethod
+    def compileFieldID(fieldReference, stores):
+        groupIndex = int(fieldReference[0]) - 1
+        if groupIndex < 0 or groupIndex >= len(stores):
+            return None
+        noteValueID = Node.compileNoteFieldID(fieldReference, stores[groupIndex])
+        if noteValueID == None:
+            return None
+        return lambda noteIndices: noteValueID(noteIndices[groupIndex])
+
+    #Method to compile a field reference into a function which retrieves its value from the note at a position in a note store,
+    #ignoring the group of the field reference (see 'getNoteFieldValue')
+    @staticmethod
+    def compileNoteFieldValue(fieldReference, store):
+        noteValueID = Node.compileNoteFieldID(fieldReference, store)
+        if noteValueID == None:
+            return None
+        values = store.valueTable.values
+        return lambda noteIndex: values[noteValueID(noteIndex)]
+
+    #Method to compile a field reference into a function which retrieves the value ID of a field (or captured regex group)
+    #from the note at a position in a note store, ignoring the group of the field reference.
+    #Returns 'None' when the field reference can never refer to a field of the store
+    @staticmethod
+    def compileNoteFieldID(fieldReference, store):
+        fieldIndex = int(fieldReference[1]) - 1
+        if store == None or fieldIndex < 0 or fieldIndex >= len(store.columns):
+            return None
+
+        #Return the value ID of the (normalized) field
+        if fieldReference[2] == None:
+            return store.keys[fieldIndex].__getitem__
+
+        #Or return the value ID of the captured regex group
+        regexIndex = int(fieldReference[2]) - 1
+        if regexIndex == -1 or store.captures == None:
+            return None
+
+        captures = store.captures[fieldIndex]
+        def valueID(noteIndex):
+            groups = captures[noteIndex]
+            if groups == None or regexIndex >= len(groups):
+                return ABSENT
+            return groups[regexIndex]
+        return valueID
+
+    #Method to check if this node is an 'and'/'or' operator
+    def isOperator(self):
+        return len(self.children) == 0 and self.string in ['and', 'or']
+
+    #Method to check if the children of this node alternate between conditions and operators
+    #(starting and ending with a condition)
+    def hasValidOperators(self):
+        for i, child in enumerate(self.children):
+            if child.isOperator() != (i % 2 == 1):
+                return False
+        return len(self.children) % 2 == 1
+
+    #Recursive method to check if this node and all of its children can be solved without raising an error
+    def isValid(self):
+        if len(self.children) == 0:
+            return self.isOperator() or self.solveMethod != None
+        if not self.hasValidOperators():
+            return False
+        for child in self.children:
+            if not child.isValid():
+                return False
+        return True
+
+    #Recursive method to return this node and all of the nodes below it
+    def allNodes(self):
+        nodes = [self]
+        for child in self.children:
+            nodes.extend(child.allNodes())
+        return nodes
+
+    #Method to return the field references used in the conditions of this node and all of the nodes below it
+    def fieldReferences(self):
+        references = []
+        for node in self.allNodes():
+            for value in [node.leftValue, node.rightValue]:
+                if isinstance(value, tuple):
+                    references.append(value)
+        return references
+
+    #Recursive method to return all of the nodes (conditions and groups of conditions)
+    #that must be 'True' for this node to be 'True', including this node itself.
+    #Since conditions are evaluated from left to right, these are the conditions joined by 'and' after the last 'or' operator
+    #(f.e. in 'A and B or C and D' only 'D' is required).
+    def requiredConditions(self):
+
+        #An elemental condition is only required by itself
+        if len(self.children) == 0:
+            return [self]
+
+        #Only continue when the children alternate between conditions and operators,
+        #otherwise nothing can be said about them
+        if not self.hasValidOperators():
+            return [self]
+
+        #Find the first condition after the condition following the last 'or' operator
+        start = 0
+        for i in range(1, len(self.children), 2):
+            if self.children[i].string == 'or':
+                start = i + 3
+
+        #Add the conditions required by every child from that point on
+        required = [self]
+        for i in range(start, len(self.children), 2):
+            required.extend(self.children[i].requiredConditions())
+        return required
+
+    #Method to return the group index (starting at 0) of a field reference,
+    #or 'None' when it isn't a valid field reference
+    @staticmethod
+    def getGroupIndex(fieldReference):
+        if not isinstance(fieldReference, tuple):
+            return None
+        for number in fieldReference:
+            if number != None and int(number) == 0:
+                return None
+        return int(fieldReference[0]) - 1
+
+    #Method to retrieve a field value from a set of notes.
+    #When 'normalized' is set, the normalized value of a normalized field is returned (see 'getNoteFieldValue')
     @staticmethod
-    def getFieldValue(notes, fieldReference):
+    def getFieldValue(notes, fieldReference, normalized = False):
 
         #When the field reference is not a field reference, return it
         if not isinstance(fieldReference, tuple):
             return fieldReference
 
-        #Get the correct field
+        #Get the correct note
         try:
             noteIndex = int(fieldReference[0]) - 1
+            if noteIndex == -1:
+                raise Exception
+            note = notes[noteIndex]
+        except Exception:
+            return False
+
+        return Node.getNoteFieldValue(note, fieldReference, normalized)
+
+    #Method to retrieve a field value from a single note, ignoring the group of the field reference.
+    #When 'normalized' is set, the normalized value ('key') of the field is returned, which is compared the same way
+    #as the compiled conditions compare it (see 'compileNoteFieldID'). Notes without it only have their field value
+    @staticmethod
+    def getNoteFieldValue(note, fieldReference, normalized = False):
+
+        #Get the correct field
+        try:
             fieldIndex = int(fieldReference[1]) - 1
-            if noteIndex == -1 or fieldIndex == -1:
+            if fieldIndex == -1:
                 raise Exception
-            field = notes[noteIndex]['compareFields'][fieldIndex]
+            field = note.compareFields[fieldIndex]
         except Exception:
             return False
 
         #When a regex group index have been given, return that
-        #otherwise return the field value
+        #otherwise return the (normalized) field value
         if fieldReference[2] != None:
             try:
                 regexIndex = int(fieldReference[2]) - 1
@@ -232,6 +538,8 @@ class Node:
                 return field['groups'][regexIndex].strip()
             except Exception:
                 return False
+        elif normalized and 'key' in field:
+            return field['key']
         else:
             return field['value']
 
@@ -239,8 +547,8 @@ class Node:
     def equalCompare(self, notes):
         
         #When either or both of the values are field references, retrieve them from the notes
-        left = self.__class__.getFieldValue(notes, self.leftValue)
-        right = self.__class__.getFieldValue(notes, self.rightValue)
+        left = self.__class__.getFieldValue(notes, self.leftValue, True)
+        right = self.__class__.getFieldValue(notes, self.rightValue, True)
 
         #Return the comparison
         if isinstance(left, bool) or isinstance(right, bool):
@@ -251,20 +559,20 @@ class Node:
     def inCompare(self, notes):
 
         #When either or both of the values are field references, retrieve them from the notes
-        left = self.__class__.getFieldValue(notes, self.leftValue)
-        right = self.__class__.getFieldValue(notes, self.rightValue)
+        left = self.__class__.getFieldValue(notes, self.leftValue, True)
+        right = self.__class__.getFieldValue(notes, self.rightValue, True)
 
         #Return the comparison
         if isinstance(left, bool) or isinstance(right, bool):
             return False
         else:
-            return left in right if ' ' in left else Utils.wordIn(left, right)
+            return left in right if ' ' in left else Text.wordIn(left, right)
 
     def insideCompare(self, notes):
 
         #When either or both of the values are field references, retrieve them from the notes
-        left = self.__class__.getFieldValue(notes, self.leftValue)
-        right = self.__class__.getFieldValue(notes, self.rightValue)
+        left = self.__class__.getFieldValue(notes, self.leftValue, True)
+        right = self.__class__.getFieldValue(notes, self.rightValue, True)
 
         #Return the comparison
         if isinstance(left, bool) or isinstance(right, bool):
@@ -272,10 +580,22 @@ class Node:
         else:
             return left in right
 
+    def similarCompare(self, notes):
+
+        #When either or both of the values are field references, retrieve them from the notes
+        left = self.__class__.getFieldValue(notes, self.leftValue, True)
+        right = self.__class__.getFieldValue(notes, self.rightValue, True)
+
+        #Return the comparison
+        if isinstance(left, bool) or isinstance(right, bool):
+            return False
+        else:
+            return Text.similar(left, right, self.threshold)
+
     def equalRegexCompare(self, notes):
 
         #When the left value is a field reference return it from the notes
-        left = self.__class__.getFieldValue(notes, self.leftValue)
+        left = self.__class__.getFieldValue(notes, self.leftValue, True)
 
         #Return the comparison
         if isinstance(left, bool):
@@ -286,7 +606,7 @@ class Node:
     def inRegexCompare(self, notes):
 
         #When the right value is a field reference return it from the notes
-        right = self.__class__.getFieldValue(notes, self.rightValue)
+        right = self.__class__.getFieldValue(notes, self.rightValue, True)
 
         #Return the comparison
         if isinstance(right, bool):
@@ -0,0 +1,41 @@
+#Import basic modules
+import os
+
+#This module doesn't import anything from Anki, since it is also imported by the worker processes
+#of a parallel comparison (see Parallel.py)
+
+#Class for a note record with the compare fields of a loaded note (see 'NoteStore.note').
+#The compare fields are a list with a dictionary for every field (name, value, normalized value ('key'), note type id and captured regex groups).
+#A note record can be shared by several rows of the queue, so it isn't changed
+class Note:
+    __slots__ = ('id', 'noteTypeID', 'compareFields')
+
+    def __init__(self, id, noteTypeID, compareFields):
+        self.id = id
+        self.noteTypeID = noteTypeID
+        self.compareFields = compareFields
+
+#Class for a note in a row of the queue, which refers to its loaded note
+#and holds the state of the row that can be changed by the user.
+#These are only created for the combinations that are duplicates.
+#When the action is 'None', the duplicate action of the group is used
+class QueueNote:
+    __slots__ = ('note', 'action', 'tag', 'replacement')
+
+    def __init__(self, note, tag = '', replacement = ''):
+        self.note = note
+        self.action = None
+        self.tag = tag
+        self.replacement = replacement
+
+    @property
+    def id(self):
+        return self.note.id
+
+    @property
+    def noteTypeID(self):
+        return self.note.noteTypeID
+
+    @property
+    def compareFields(self):
+        return self.note.compareFields
@@ -0,0 +1,108 @@
+#Import basic modules
+import os, sys, multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+#Import local .py modules
+from . import Node, Planner, Join, Profiler
+Node = Node.Node
+Planner = Planner.Planner
+Join = Join.Join
+Profiler = Profiler.Profiler
+
+#This module (and the modules it imports) doesn't import anything from Anki,
+#since it is imported again by every worker process of a parallel comparison.
+
+#The number of notes of the first group a worker compares before it reports its progress
+progressInterval = 100
+
+#The state of a worker process, which is set once when the process starts (see 'initWorker')
+worker = {}
+
+#Function to set up a worker process with a snapshot of the note stores (see Store.py)
+#and the settings needed to plan the comparison the same way as the main process (see 'Comparer.getSettings')
+def initWorker(stores, settings, stopEvent, progressCounter):
+    conditionTree = Node(settings['conditionString'], removeBrackets = False)
+    if settings['advancedMode']:
+        conditionTree.createChildren()
+    planner = Planner.create(settings['groupNum'], settings['advancedMode'], conditionTree, settings['numRows'])
+
+    #When profiling is enabled, record the evaluations of the conditions in this process as well
+    worker['profiler'] = Profiler(conditionTree if settings['advancedMode'] else None) if settings['profile'] else None
+    planner.profiler = worker['profiler']
+
+    worker['join'] = Join(stores, planner.createIndexes(stores), planner.condition(stores))
+    worker['stopEvent'] = stopEvent
+    worker['progressCounter'] = progressCounter
+
+#Function to compare the notes of the first group from 'start' up to 'end' with the other groups in a worker process.
+#Returns the duplicate combinations of note positions in the same order as 'Join.combinations'
+#and the statistics of the conditions evaluated for them when profiling is enabled (see 'Profiler.takeConditions')
+def compareShard(start, end):
+    progressCounter = worker['progressCounter']
+    reported = 0
+
+    #Add the number of compared notes to the shared progress counter every so often
+    def progress(completed):
+        nonlocal reported
+        if completed - reported >= progressInterval or completed == end - start:
+            with progressCounter.get_lock():
+                progressCounter.value += completed - reported
+            reported = completed
+
+    duplicates = list(worker['join'].combinations(progress, worker['stopEvent'].is_set, start, end))
+    return duplicates, worker['profiler'].takeConditions() if worker['profiler'] != None else None
+
+#Function to return whether worker processes can be started. They are spawned with the interpreter that runs Anki ('sys.executable'),
+#which in a packaged (frozen) build of Anki is the Anki program itself instead of a Python interpreter that can run a worker
+def isAvailable():
+    return not getattr(sys, 'frozen', False)
+
+#Function to find the duplicate combinations of note positions in the note stores using 'numWorkers' processes.
+#The notes of the first group are split into shards which are compared with the other groups in separate processes.
+#'found' is called with the duplicates of every shard and the end of the shard as soon as the shard and all of the shards before it are done,
+#so the duplicates are found in the same order as comparing them in a single process.
+#Only the notes of the first group from 'start' on are compared.
+#'progress' is called with the number of compared notes of the first group and when 'stopped' returns 'True'
+#all of the workers are stopped. When a profiler is given, the statistics of the conditions of the workers are added to it
+def compare(stores, settings, numWorkers, progress, stopped, found, start = 0, profiler = None):
+    context = multiprocessing.get_context('spawn')
+    stopEvent = context.Event()
+    progressCounter = context.Value('q', 0)
+
+    #Split the notes of the first group into a few shards per worker,
+    #so that the workers finish at about the same time
+    numNotes = len(stores[0]) - start
+    numShards = max(1, min(numNotes, numWorkers * 4))
+    bounds = [(start + numNotes * i // numShards, start + numNotes * (i + 1) // numShards) for i in range(numShards)]
+    results = [None] * numShards
+    nextShard = 0
+
+    with ProcessPoolExecutor(numWorkers, mp_context = context, initializer = initWorker,
+        initargs = (stores, settings, stopEvent, progressCounter)) as executor:
+
+        futures = {executor.submit(compareShard, shardStart, shardEnd): i for i, (shardStart, shardEnd) in enumerate(bounds)}
+        pending = set(futures)
+        while len(pending) > 0:
+            done, pending = wait(pending, timeout = 0.2, return_when = FIRST_COMPLETED)
+            for future in done:
+                results[futures[future]] = future.result()
+
+            #Pass on the results of the shards that are done in order
+            while nextShard < numShards and results[nextShard] != None:
+                duplicates, conditions = results[nextShard]
+                if profiler != None and conditions != None:
+                    profiler.addConditions(conditions)
+                found(duplicates, bounds[nextShard][1])
+                results[nextShard] = None
+                nextShard += 1
+
+            #Report the progress of all workers together (once any notes have been compared)
+            if progressCounter.value > 0:
+                progress(progressCounter.value)
+
+            #When the comparison should be stopped, let the running workers stop and cancel the other shards
+            if stopped():
+                stopEvent.set()
+                for future in pending:
+                    future.cancel()
+                return
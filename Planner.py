@@ -0,0 +1,243 @@
+#Import basic modules
+import os, functools
+
+#Import local .py modules
+from . import Node, Index, Store
+Node = Node.Node
+ABSENT = Store.ABSENT
+HashIndex = Index.HashIndex
+WordIndex = Index.WordIndex
+NgramIndex = Index.NgramIndex
+MinHashIndex = Index.MinHashIndex
+
+#Class to plan how the duplicates between groups of notes can be found without comparing every combination.
+#Conditions comparing fields of two groups which must always be 'True' are turned into indexes (see Index.py and Join.py),
+#so that only combinations which can match are solved with the remaining conditions.
+class Planner:
+
+    def __init__(self, groupNum):
+        self.groupNum = groupNum
+        self.conditionTree = None
+
+        #A list of the required comparisons between the fields of two groups as
+        #(index class or 'None' for equal fields, left field reference, left group, right field reference, right group).
+        #Which of both groups is indexed depends on the order in which the groups are joined (see 'createIndexes')
+        self.pairConditions = []
+
+        #For every group a list of conditions which only use the fields of that group.
+        #These are solved once per note and notes for which they are 'False' are left out (see 'createPrefilter')
+        self.prefilters = [[] for i in range(groupNum)]
+
+        #Whether a required condition without any fields is 'False', so that there can't be any duplicates
+        self.impossible = False
+
+        #The condition nodes which are always 'True' for the combinations returned by the join
+        self.satisfied = set()
+
+        #The profiler which records the evaluations of the compiled conditions (see Profiler.py), or 'None' when profiling is disabled
+        self.profiler = None
+
+    #Method to create a planner for the comparison of 'groupNum' groups.
+    #In simple mode duplicates are notes with exactly matching field rows, so the groups can be joined on these values.
+    #In advanced mode the groups are joined on the required comparisons between groups in the condition tree (if any)
+    #and the required conditions that only use a single group are solved once per note while loading the notes.
+    @classmethod
+    def create(cls, groupNum, advancedMode, conditionTree, numRows):
+        planner = cls(groupNum)
+        if advancedMode:
+            planner.planConditions(conditionTree)
+        else:
+            planner.planFieldRows(numRows)
+        return planner
+
+    #Method to plan the comparison in simple mode, where the first 'numRows' fields of every group
+    #must exactly match those of the first group
+    def planFieldRows(self, numRows):
+        for groupIndex in range(1, self.groupNum):
+            for rowIndex in range(numRows):
+                self.pairConditions.append((None,
+                    ('1', str(rowIndex + 1), None), 0,
+                    (str(groupIndex + 1), str(rowIndex + 1), None), groupIndex
+                ))
+
+    #Method to plan the comparison in advanced mode using the (already created) condition tree
+    def planConditions(self, conditionTree):
+        self.conditionTree = conditionTree
+
+        covered = set()
+        for node in conditionTree.requiredConditions():
+
+            #Skip the nodes inside conditions that are already solved before the join
+            if node in covered:
+                continue
+
+            #Required conditions which only use the fields of a single group (or none at all)
+            #are solved before the join, so they don't need to be solved for every combination
+            groups = self.referencedGroups(node)
+            if groups != None and len(groups) <= 1 and node.isValid():
+                if len(groups) == 0:
+                    self.impossible = self.impossible or not node.solve([])
+                else:
+                    self.prefilters[groups.pop()].append(node)
+                self.satisfied.add(node)
+                covered.update(node.allNodes())
+                continue
+
+            #Every required comparison between fields of two different groups is used to index one of both groups
+            if len(node.children) > 0:
+                continue
+
+            leftGroup = self.getGroupIndex(node.leftValue)
+            rightGroup = self.getGroupIndex(node.rightValue)
+            if leftGroup == None or rightGroup == None or leftGroup == rightGroup:
+                continue
+
+            #Equal comparisons are satisfied by the join itself, other conditions are still solved afterwards
+            if node.solveMethod == node.equalCompare:
+                self.pairConditions.append((None, node.leftValue, leftGroup, node.rightValue, rightGroup))
+                self.satisfied.add(node)
+
+            elif node.solveMethod in [node.inCompare, node.insideCompare]:
+                indexClass = WordIndex if node.solveMethod == node.inCompare else NgramIndex
+                self.pairConditions.append((indexClass, node.leftValue, leftGroup, node.rightValue, rightGroup))
+
+            elif node.solveMethod == node.similarCompare:
+                indexClass = functools.partial(MinHashIndex, threshold = node.threshold)
+                self.pairConditions.append((indexClass, node.leftValue, leftGroup, node.rightValue, rightGroup))
+
+    #Method to return the set of group indices used by the fields in a node,
+    #or 'None' when one of the fields doesn't belong to one of the groups
+    def referencedGroups(self, node):
+        groups = set()
+        for fieldReference in node.fieldReferences():
+            groupIndex = int(fieldReference[0]) - 1
+            if groupIndex < 0 or groupIndex >= self.groupNum:
+                return None
+            groups.add(groupIndex)
+        return groups
+
+    #Method to return a function which checks if the note at a position in the note store of a group
+    #satisfies the conditions which only use that group
+    def createPrefilter(self, groupIndex, store):
+        if self.impossible:
+            return lambda noteIndex: False
+
+        stores = [None] * self.groupNum
+        stores[groupIndex] = store
+        conditions = [node.compile(stores, profiler = self.profiler) for node in self.prefilters[groupIndex]]
+        noteIndices = [None] * self.groupNum
+
+        def prefilter(noteIndex):
+            noteIndices[groupIndex] = noteIndex
+            for condition in conditions:
+                if not condition(noteIndices):
+                    return False
+            return True
+        return prefilter
+
+    #Method to return the group index of a field reference,
+    #or 'None' when it is not a valid field reference of one of the groups
+    def getGroupIndex(self, fieldReference):
+        groupIndex = Node.getGroupIndex(fieldReference)
+        if groupIndex == None or groupIndex >= self.groupNum:
+            return None
+        return groupIndex
+
+    #Method to create the indexes (see Join.py) for the note store (see Store.py) of every group
+    #when the groups are joined in the given order (by default the order of the groups).
+    #Of every required comparison between two groups, the field of the group that comes later in the order is indexed
+    #and the field of the earlier group is used to probe the index
+    def createIndexes(self, stores, order = None):
+        order = list(range(self.groupNum)) if order == None else order
+        position = {groupIndex: i for i, groupIndex in enumerate(order)}
+
+        #For every group a list of equal field reference pairs (reference of an earlier group, reference of this group)
+        #and a list of 'in', '>' and '~' conditions with a field of this group and a field of an earlier group
+        #as (index class, reference of an earlier group, reference of this group, whether this group is the right operand)
+        joinConditions = [[] for i in range(self.groupNum)]
+        indexConditions = [[] for i in range(self.groupNum)]
+        for indexClass, leftValue, leftGroup, rightValue, rightGroup in self.pairConditions:
+            if position[leftGroup] < position[rightGroup]:
+                earlierValue, laterValue, laterGroup, indexRight = leftValue, rightValue, rightGroup, True
+            else:
+                earlierValue, laterValue, laterGroup, indexRight = rightValue, leftValue, leftGroup, False
+            if indexClass == None:
+                joinConditions[laterGroup].append((earlierValue, laterValue))
+            else:
+                indexConditions[laterGroup].append((indexClass, earlierValue, laterValue, indexRight))
+
+        indexes = []
+        for groupIndex in range(self.groupNum):
+            store = stores[groupIndex]
+            groupIndexes = []
+
+            #All equal comparisons of a group are combined into a single key of value IDs
+            conditions = joinConditions[groupIndex]
+            if len(conditions) > 0:
+                probeValueIDs = [self.orDefault(Node.compileFieldID(c[0], stores), ABSENT) for c in conditions]
+                indexValueIDs = [self.orDefault(Node.compileNoteFieldID(c[1], store), ABSENT) for c in conditions]
+                groupIndexes.append(HashIndex(len(store),
+                    lambda noteIndices, valueIDs = probeValueIDs: self.key(noteIndices, valueIDs),
+                    lambda noteIndex, valueIDs = indexValueIDs: self.key(noteIndex, valueIDs)
+                ))
+
+            for indexClass, probeReference, indexReference, indexRight in indexConditions[groupIndex]:
+                groupIndexes.append(indexClass(len(store),
+                    self.orDefault(Node.compileFieldValue(probeReference, stores), False),
+                    self.orDefault(Node.compileNoteFieldValue(indexReference, store), False),
+                    indexRight
+                ))
+
+            indexes.append(groupIndexes)
+        return indexes
+
+    #Method to return a function which checks all of the conditions (also the ones satisfied by the join or the prefilters)
+    #for a combination of notes in the note stores
+    def check(self, stores):
+        if self.conditionTree != None:
+            return self.conditionTree.compile(stores, profiler = self.profiler)
+
+        #In simple mode all of the compared fields must be equal
+        valueIDs = []
+        for indexClass, leftValue, leftGroup, rightValue, rightGroup in self.pairConditions:
+            valueIDs.append((
+                self.orDefault(Node.compileFieldID(leftValue, stores), ABSENT),
+                self.orDefault(Node.compileFieldID(rightValue, stores), ABSENT)
+            ))
+
+        def check(noteIndices):
+            for left, right in valueIDs:
+                valueID = left(noteIndices)
+                if valueID == ABSENT or valueID != right(noteIndices):
+                    return False
+            return True
+        return check
+
+    #Method to return a compiled field function (see 'Node.compileFieldValue'),
+    #or a function which always returns 'default' when the field can never be present
+    @staticmethod
+    def orDefault(function, default):
+        if function == None:
+            return lambda notes: default
+        return function
+
+    #Method to return the key of a note or combination of notes using the given (compiled) value IDs of fields,
+    #or 'None' if one of the fields is not present (and thus never matches)
+    @staticmethod
+    def key(notes, valueIDs):
+        key = tuple(valueID(notes) for valueID in valueIDs)
+        if ABSENT in key:
+            return None
+        return key
+
+    #Method to return the (compiled) function that checks the remaining conditions for a combination
+    #of notes in the note stores returned by the join, or 'None' if there are no remaining conditions
+    def condition(self, stores):
+        if self.conditionTree == None:
+            return None
+
+        #When the remaining conditions are always 'True' there is nothing left to check
+        function, constant = self.conditionTree.compileNode(stores, self.satisfied)
+        if function == None and constant:
+            return None
+        return self.conditionTree.compile(stores, self.satisfied, self.profiler)
@@ -0,0 +1,98 @@
+#Import basic modules
+import os, time
+from contextlib import contextmanager
+
+#This module doesn't import anything from Anki, since it is also imported by the worker processes
+#of a parallel comparison (see Parallel.py)
+
+#Class to record where the time of a comparison goes: the wall time and number of calls of every phase and,
+#when profiling is enabled (see 'Comparer.profile'), for every elemental condition of the condition tree
+#the number of evaluations, the number of times it was 'True' and the time spent evaluating it.
+#Conditions are numbered in the order in which they appear in the condition tree,
+#so that the statistics of the worker processes of a parallel comparison can be added to them.
+#When profiling is disabled only the main phases of a run are measured, so that nothing is measured per note or condition
+class Profiler:
+
+    def __init__(self, conditionTree = None):
+        self.startTime = time.perf_counter()
+        self.phases = {}
+        self.conditionNums = {}
+        self.conditions = []
+        if conditionTree != None:
+            for node in conditionTree.allNodes():
+                if len(node.children) == 0 and not node.isOperator():
+                    self.conditionNums[node] = len(self.conditions)
+                    self.conditions.append([node.string, 0, 0, 0.0])
+
+    #Method to add the time and number of calls of a phase
+    def addPhase(self, name, seconds, calls = 1):
+        phase = self.phases.setdefault(name, [0.0, 0])
+        phase[0] += seconds
+        phase[1] += calls
+
+    #Context manager to measure the wall time of a phase, which can be entered several times
+    @contextmanager
+    def phase(self, name):
+        startTime = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.addPhase(name, time.perf_counter() - startTime)
+
+    #Method to return a function which calls 'function' and adds the time of every call to a phase
+    def timed(self, name, function):
+        phase = self.phases.setdefault(name, [0.0, 0])
+        perfCounter = time.perf_counter
+        def timedFunction(*args):
+            startTime = perfCounter()
+            try:
+                return function(*args)
+            finally:
+                phase[0] += perfCounter() - startTime
+                phase[1] += 1
+        return timedFunction
+
+    #Method to return a compiled condition (see 'Node.compileCondition') which records its evaluations,
+    #or the condition itself when it isn't part of the condition tree of the profiler
+    def timedCondition(self, node, function):
+        if node not in self.conditionNums:
+            return function
+        statistics = self.conditions[self.conditionNums[node]]
+        perfCounter = time.perf_counter
+        def timedFunction(noteIndices):
+            startTime = perfCounter()
+            result = function(noteIndices)
+            statistics[3] += perfCounter() - startTime
+            statistics[1] += 1
+            if result:
+                statistics[2] += 1
+            return result
+        return timedFunction
+
+    #Method to return the statistics of the conditions recorded since the last call and start counting from zero again
+    def takeConditions(self):
+        conditions = [c[1:] for c in self.conditions]
+        for c in self.conditions:
+            c[1:] = [0, 0, 0.0]
+        return conditions
+
+    #Method to add the statistics of the conditions of another profiler (see 'takeConditions')
+    def addConditions(self, conditions):
+        for statistics, (evaluations, trues, seconds) in zip(self.conditions, conditions):
+            statistics[1] += evaluations
+            statistics[2] += trues
+            statistics[3] += seconds
+
+    #Method to return the recorded statistics as a dictionary with the seconds since the profiler was created,
+    #a list of phases (name, calls, seconds) and a list of conditions (condition, evaluations, rate of evaluations that were 'True', seconds)
+    def statistics(self):
+        return {
+            'seconds': time.perf_counter() - self.startTime,
+            'phases': [{'name': name, 'calls': calls, 'seconds': seconds} for name, (seconds, calls) in self.phases.items()],
+            'conditions': [{
+                'condition': string,
+                'evaluations': evaluations,
+                'trueRate': trues / evaluations if evaluations > 0 else None,
+                'seconds': seconds
+            } for string, evaluations, trues, seconds in self.conditions]
+        }
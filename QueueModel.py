@@ -0,0 +1,153 @@
+#Import basic modules
+import os
+
+#Import all of the Qt GUI library
+from aqt.qt import *
+
+#Class for a table model over the rows of the queue of a Comparer, so that a table view only has to create the cells that are visible.
+#Every group has three columns: the compare fields of the note, its action and its tag or replacement.
+#The tool tip with all of the fields of a note is only created by 'toolTipFunction' when hovering over it.
+#Rows that are added to the queue later (while the comparison is still running) are shown after calling 'addRows'
+class QueueModel(QAbstractTableModel):
+
+    #Delegate to show the compare fields of a note as rich text, like a label would
+    class FieldsDelegate(QStyledItemDelegate):
+        def paint(self, painter, option, index):
+            option = QStyleOptionViewItem(option)
+            self.initStyleOption(option, index)
+
+            #Draw the cell without its text and then the text as rich text on top of it
+            document = QTextDocument()
+            document.setHtml(option.text)
+            document.setTextWidth(option.rect.width())
+            option.text = ''
+            style = option.widget.style() if option.widget != None else QApplication.style()
+            style.drawControl(QStyle.CE_ItemViewItem, option, painter, option.widget)
+
+            painter.save()
+            painter.translate(option.rect.topLeft())
+            document.drawContents(painter, QRectF(0, 0, option.rect.width(), option.rect.height()))
+            painter.restore()
+
+    #Delegate to choose the action of a note from a combobox, which is only created while the cell is edited
+    class ActionDelegate(QStyledItemDelegate):
+        def __init__(self, actions, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.actions = actions
+
+        #Create the combobox, disable the wheel event and save the action as soon as another one is chosen
+        def createEditor(self, parent, option, index):
+            actionBox = QComboBox(parent)
+            actionBox.addItems(self.actions)
+            actionBox.wheelEvent = lambda event: None
+            actionBox.activated.connect(lambda: self.commitData.emit(actionBox))
+            return actionBox
+
+        def setEditorData(self, editor, index):
+            editor.setCurrentText(index.data(Qt.EditRole))
+
+        def setModelData(self, editor, model, index):
+            model.setData(index, editor.currentText(), Qt.EditRole)
+
+    def __init__(self, Comparer, toolTipFunction, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.Comparer = Comparer
+        self.queue = Comparer.queue
+        self.numRows = len(self.queue)
+        self.toolTipFunction = toolTipFunction
+
+    #Method to show the rows of the queue up to 'numRows'
+    def addRows(self, numRows):
+        numRows = min(numRows, len(self.queue))
+        if numRows > self.numRows:
+            self.beginInsertRows(QModelIndex(), self.numRows, numRows - 1)
+            self.numRows = numRows
+            self.endInsertRows()
+
+    def rowCount(self, parent = QModelIndex()):
+        return 0 if parent.isValid() else self.numRows
+
+    def columnCount(self, parent = QModelIndex()):
+        return 0 if parent.isValid() else self.Comparer.groupNum * 3
+
+    def headerData(self, section, orientation, role = Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return [f'Group {section // 3 + 1}: Note fields', 'Action', 'Tag/Replacement'][section % 3]
+        return super().headerData(section, orientation, role)
+
+    #Method to return the action of a note, which is either a set one or the default one of its group
+    def action(self, note, groupIndex):
+        return note.action if note.action != None else self.Comparer.groups[groupIndex].duplicateAction
+
+    #Method to return the name of the attribute of a note which holds the text for an action, or 'None' when it has no text
+    def textType(self, action):
+        if action == 'Tag with...':
+            return 'tag'
+        elif action.startswith('Replace'):
+            return 'replacement'
+        return None
+
+    def data(self, index, role = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        #Retrieve the note of the cell and the kind of column
+        groupIndex = index.column() // 3
+        column = index.column() % 3
+        note = self.queue[index.row()][groupIndex]
+
+        #A description of the compare fields of the note and all of its fields when hovering over it
+        if column == 0:
+            if role == Qt.DisplayRole:
+                return '<br>'.join([f"<b>{f['name']}:</b> {f['value']}" for f in note.compareFields])
+            elif role == Qt.ToolTipRole:
+                return self.toolTipFunction(note.id)
+
+        #The action of the note
+        elif column == 1:
+            if role in (Qt.DisplayRole, Qt.EditRole):
+                return self.action(note, groupIndex)
+
+        #The tag or replacement of the note, depending on its action
+        elif role in (Qt.DisplayRole, Qt.EditRole):
+            textType = self.textType(self.action(note, groupIndex))
+            return getattr(note, textType) if textType != None else ''
+
+        return None
+
+    #Method to only make the actions and the texts of actions that use one editable
+    def flags(self, index):
+        flags = super().flags(index)
+        column = index.column() % 3
+        if column == 1:
+            flags |= Qt.ItemIsEditable
+        elif column == 2:
+            note = self.queue[index.row()][index.column() // 3]
+            if self.textType(self.action(note, index.column() // 3)) != None:
+                flags |= Qt.ItemIsEditable
+        return flags
+
+    #Method to update the action or the text of a note in the queue
+    def setData(self, index, value, role = Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+
+        groupIndex = index.column() // 3
+        column = index.column() % 3
+        note = self.queue[index.row()][groupIndex]
+
+        #When the action changes, the text shown for it changes as well
+        if column == 1:
+            note.action = value
+            self.dataChanged.emit(index, index.sibling(index.row(), index.column() + 1))
+            return True
+
+        elif column == 2:
+            textType = self.textType(self.action(note, groupIndex))
+            if textType == None:
+                return False
+            setattr(note, textType, value)
+            self.dataChanged.emit(index, index)
+            return True
+
+        return False
@@ -0,0 +1,124 @@
+#Import basic modules
+import os, re, json, sqlite3
+from urllib.request import pathname2url
+
+#This module doesn't import anything from Anki, since it is used to compare the notes of a collection without Anki (see Headless.py)
+
+#Class to open an Anki collection file (.anki2) read-only, with the parts of a collection ('mw.col') which are needed to compare its notes.
+#Both the older collections, which keep their note types, decks and tags in the 'col' table,
+#and the newer collections, which keep them in separate tables, are supported.
+#The collection can't be opened while Anki has it open, since Anki locks it
+class ReadOnlyCollection:
+
+    #Class for the database of the collection, with the same methods as the database of an Anki collection
+    class DB:
+        def __init__(self, path):
+            self.connection = sqlite3.connect(f'file:{pathname2url(os.path.abspath(path))}?mode=ro', uri = True)
+
+        def execute(self, sql, *args):
+            return self.connection.execute(sql, args).fetchall()
+
+        def list(self, sql, *args):
+            return [row[0] for row in self.connection.execute(sql, args)]
+
+        def first(self, sql, *args):
+            return self.connection.execute(sql, args).fetchone()
+
+        def scalar(self, sql, *args):
+            row = self.first(sql, *args)
+            return row[0] if row != None else None
+
+        def hasTable(self, name):
+            return self.scalar("select count() from sqlite_master where type = 'table' and name = ?", name) > 0
+
+        def close(self):
+            self.connection.close()
+
+    #Class for the note types of the collection, of which only the id, name, modification time and field names are read
+    class Models:
+        def __init__(self, db):
+            if db.hasTable('notetypes'):
+                self.models = {}
+                for id, name, mod in db.execute('select id, name, mtime_secs from notetypes order by id'):
+                    fields = [{'name': f, 'ord': o} for o, f in db.execute('select ord, name from fields where ntid = ? order by ord', id)]
+                    self.models[id] = {'id': id, 'name': name, 'mod': mod, 'flds': fields}
+            else:
+                self.models = {m['id']: m for m in json.loads(db.scalar('select models from col')).values()}
+
+        def all(self):
+            return list(self.models.values())
+
+        def get(self, id):
+            return self.models.get(id)
+
+    #Class for the decks of the collection, of which only the id and name are read.
+    #The newer collections separate the names of parent and child decks with '\x1f' instead of '::'
+    class Decks:
+        def __init__(self, db):
+            if db.hasTable('decks'):
+                self.decks = [{'id': id, 'name': name.replace('\x1f', '::')} for id, name in db.execute('select id, name from decks order by id')]
+            else:
+                self.decks = [{'id': d['id'], 'name': d['name']} for d in json.loads(db.scalar('select decks from col')).values()]
+
+        def all(self):
+            return self.decks
+
+        def children(self, did):
+            name = [d['name'] for d in self.decks if d['id'] == did][0]
+            return [(d['name'], d['id']) for d in self.decks if d['name'].startswith(name + '::')]
+
+    #Class for the tags of the collection
+    class Tags:
+        def __init__(self, db):
+            if db.hasTable('tags'):
+                self.tags = db.list('select tag from tags order by tag')
+            else:
+                self.tags = sorted(json.loads(db.scalar('select tags from col')))
+
+        def all(self):
+            return self.tags
+
+    def __init__(self, path):
+        self.path = path
+        self.db = self.DB(path)
+        try:
+            self.models = self.Models(self.db)
+            self.decks = self.Decks(self.db)
+            self.tags = self.Tags(self.db)
+        except (sqlite3.Error, ValueError, TypeError) as e:
+            self.db.close()
+            raise sqlite3.DatabaseError(f'\'{path}\' is not an Anki collection that can be read: {e}')
+
+    def close(self):
+        self.db.close()
+
+    #Method to return the SQL pattern of a name in a search, in which '*' matches any text like it does in Anki
+    @staticmethod
+    def likePattern(name):
+        return re.sub(r'([\\%_])', r'\\\1', name).replace('*', '%')
+
+    #Method to find the notes of a search, of which only searches for a deck ('deck:"name"'), a note type ('note:"name"')
+    #and notes with all of a number of tags ('tag:a and tag:b') are supported. Like in Anki, the names are case insensitive,
+    #a deck includes its child decks (and the cards of filtered decks that came from them) and a tag includes its child tags
+    def find_notes(self, search):
+        match = re.fullmatch(r'(deck|note):"(.*)"', search)
+        if match != None:
+            kind, name = match.groups()
+            pattern = self.likePattern(name)
+            if kind == 'deck':
+                dids = [d['id'] for d in self.decks.all()
+                    if self.db.scalar("select ? like ? escape '\\' or ? like ? escape '\\'", d['name'], pattern, d['name'], pattern + '::%')]
+                dids = ','.join(str(did) for did in dids)
+                return self.db.list(f'select distinct nid from cards where did in ({dids}) or odid in ({dids}) order by nid')
+            mids = ','.join(str(m['id']) for m in self.models.all() if self.db.scalar("select ? like ? escape '\\'", m['name'], pattern))
+            return self.db.list(f'select id from notes where mid in ({mids}) order by id')
+
+        tags = re.findall(r'tag:(\S+)', search)
+        if len(tags) > 0 and re.fullmatch(r'tag:\S+( and tag:\S+)*', search) != None:
+            conditions = ' and '.join(["(tags like ? escape '\\' or tags like ? escape '\\')"] * len(tags))
+            patterns = []
+            for tag in tags:
+                patterns.extend([f'% {self.likePattern(tag)} %', f'% {self.likePattern(tag)}::%'])
+            return self.db.list(f'select id from notes where {conditions} order by id', *patterns)
+
+        raise ValueError(f'The search \'{search}\' is not supported without Anki.')
@@ -0,0 +1,72 @@
+#Import basic modules
+import os, sys, time, json, hashlib, sqlite3
+
+#Import the module to measure the memory of the process, which doesn't exist on Windows
+try:
+    import resource
+except ImportError:
+    resource = None
+
+#Class to keep a record of every completed comparison in an SQLite file, so that the runs of the same configuration
+#(see 'Comparer.getRunConfig') can be compared with each other to notice when comparisons become slower (see HistoryDialog.py).
+#Every record is a dictionary with the time of the run, the version of the add-on code, the number of notes of every group,
+#the number of combinations of loaded notes, the number of duplicates, the total seconds, the seconds of every phase,
+#the peak memory of the process, the way the notes were compared and the number of processes
+class RunHistory:
+
+    #The maximum number of runs that are kept per configuration and in total
+    #and the number of days after which the runs of configurations that haven't been used are removed
+    maxRuns = 100
+    maxTotalRuns = 1000
+    maxDays = 365
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute('''create table if not exists runs (
+            id integer primary key,
+            config text not null,
+            time integer not null,
+            data text not null
+        )''')
+        self.db.execute('create index if not exists runs_config on runs (config, time)')
+
+    #Method to return a short hash of the code of the add-on in 'folder', which changes whenever the add-on is updated
+    @staticmethod
+    def codeVersion(folder):
+        code = hashlib.sha1()
+        for name in sorted(os.listdir(folder)):
+            if name.endswith('.py'):
+                with open(os.path.join(folder, name), 'rb') as file:
+                    code.update(file.read())
+        return code.hexdigest()[:8]
+
+    #Method to return the peak memory (in bytes) of the current process since it started,
+    #or 'None' when it can't be measured (on Windows)
+    @staticmethod
+    def peakMemory():
+        if resource == None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+    #Method to add the record of a run of a configuration and remove the oldest runs of the configuration above 'maxRuns',
+    #the runs of configurations that haven't been used for 'maxDays' days and the oldest runs above 'maxTotalRuns'
+    def add(self, config, record):
+        now = int(time.time())
+        self.db.execute('insert into runs (config, time, data) values (?, ?, ?)', (config, now, json.dumps(record, separators = (',', ':'))))
+        self.db.execute('delete from runs where config = ? and id not in (select id from runs where config = ? order by time desc, id desc limit ?)',
+            (config, config, self.maxRuns))
+        self.db.execute('delete from runs where config in (select config from runs group by config having max(time) < ?)',
+            (now - self.maxDays * 24 * 60 * 60,))
+        numRuns = self.db.execute('select count(*) from runs').fetchone()[0]
+        if numRuns > self.maxTotalRuns:
+            self.db.execute('delete from runs where id in (select id from runs order by time, id limit ?)', (numRuns - self.maxTotalRuns,))
+        self.db.commit()
+
+    #Method to return the records of the runs of a configuration, starting with the latest one
+    def runs(self, config):
+        return [json.loads(data) for data, in self.db.execute('select data from runs where config = ? order by time desc, id desc', (config,))]
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,125 @@
+#Import basic modules
+import os
+from array import array
+
+#Import local .py modules
+from . import Note
+Note = Note.Note
+
+#This module doesn't import anything from Anki, since the stores are also sent to the worker processes
+#of a parallel comparison (see Parallel.py)
+
+#The value ID of a field (or captured regex group) that is not present, which has the value 'False'
+ABSENT = 0
+
+#Class to store every distinct field value of a comparison once and give it a number (value ID).
+#All of the groups of a comparison share the same value table, so equal values of different groups
+#have the same value ID and can be compared as numbers
+class ValueTable:
+
+    def __init__(self):
+        self.values = [False]
+        self.valueIDs = {}
+
+    #Method to return the value ID of a value, adding the value when it is new.
+    #Anything other than text is a value that is not present
+    def intern(self, value):
+        if not isinstance(value, str):
+            return ABSENT
+        valueID = self.valueIDs.get(value)
+        if valueID == None:
+            valueID = len(self.values)
+            self.values.append(value)
+            self.valueIDs[value] = valueID
+        return valueID
+
+#Class to store the loaded notes of a group by column instead of by note:
+#an array with the note IDs, an array with the note type IDs and for every compare field (row) of the group
+#an array with the value ID of that field for every note.
+#When regex capture is enabled, there is also a list for every compare field with the value IDs of the captured groups of every note
+#(or 'None' when the regular expression didn't match or has no groups).
+#Every compare field also has a key column with the value IDs of the normalized values (see 'Text.normalizer') that are compared,
+#which is the column itself for a field that isn't normalized.
+#A note is referred to by its position in the store. The note records created for the queue are kept per position,
+#so that the rows of the queue with the same note share its record.
+class NoteStore:
+
+    #'normalized' optionally contains for every compare field whether its values are normalized
+    def __init__(self, valueTable, fieldNames, regexCapture = False, normalized = None):
+        self.valueTable = valueTable
+        self.fieldNames = fieldNames
+        self.noteIDs = array('q')
+        self.noteTypeIDs = array('q')
+        self.columns = [array('i') for f in fieldNames]
+        self.captures = [[] for f in fieldNames] if regexCapture else None
+        normalized = [False] * len(fieldNames) if normalized == None else normalized
+        self.keys = [array('i') if n else column for column, n in zip(self.columns, normalized)]
+        self.notes = {}
+
+    def __len__(self):
+        return len(self.noteIDs)
+
+    #Method to add a note with the given field values (or 'False' when a field is not present),
+    #for every field the captured groups (or 'None') and for every normalized field its normalized value.
+    #Returns the position of the note in the store
+    def add(self, noteID, noteTypeID, fieldValues, fieldCaptures = None, fieldKeys = None):
+        intern = self.valueTable.intern
+        self.noteIDs.append(noteID)
+        self.noteTypeIDs.append(noteTypeID)
+        for column, value in zip(self.columns, fieldValues):
+            column.append(intern(value))
+        if fieldKeys != None:
+            for column, keys, key in zip(self.columns, self.keys, fieldKeys):
+                if keys is not column:
+                    keys.append(intern(key))
+
+        #The captured groups are stored without surrounding whitespace, as they are compared that way
+        if self.captures != None:
+            for captures, groups in zip(self.captures, fieldCaptures):
+                if groups == None:
+                    captures.append(None)
+                else:
+                    captures.append(tuple(intern(g.strip()) if g != None else ABSENT for g in groups))
+        return len(self.noteIDs) - 1
+
+    #Method to remove the last added note
+    def removeLast(self):
+        self.noteIDs.pop()
+        self.noteTypeIDs.pop()
+        for column, keys in zip(self.columns, self.keys):
+            column.pop()
+            if keys is not column:
+                keys.pop()
+        if self.captures != None:
+            for captures in self.captures:
+                captures.pop()
+        self.notes.pop(len(self.noteIDs), None)
+
+    #Method to return the value of a field of a note, or 'False' when it is not present
+    def value(self, noteIndex, fieldIndex):
+        return self.valueTable.values[self.columns[fieldIndex][noteIndex]]
+
+    #Method to create a note record (see Note.py) with the compare fields of a note in the store, including their normalized values ('key'),
+    #which is only done for the notes in the queue. The record of a position is only created once
+    def note(self, noteIndex):
+        note = self.notes.get(noteIndex)
+        if note != None:
+            return note
+
+        values = self.valueTable.values
+        noteTypeID = self.noteTypeIDs[noteIndex]
+        compareFields = []
+        for fieldIndex, name in enumerate(self.fieldNames):
+            value = self.value(noteIndex, fieldIndex)
+            groups = None
+            if self.captures != None and self.captures[fieldIndex][noteIndex] != None:
+                groups = tuple(values[g] if g != ABSENT else None for g in self.captures[fieldIndex][noteIndex])
+            compareFields.append({
+                'name': name,
+                'value': value,
+                'key': values[self.keys[fieldIndex][noteIndex]],
+                'noteTypeID': noteTypeID if value != False else False,
+                'groups': groups
+            })
+        note = self.notes[noteIndex] = Note(self.noteIDs[noteIndex], noteTypeID, compareFields)
+        return note
@@ -0,0 +1,139 @@
+#Import basic modules
+import os, re, html, unicodedata, functools
+
+#This module doesn't import anything from Anki, so that it can also be used
+#in the worker processes of a parallel comparison (see Parallel.py)
+
+#Method to search for a word in a string
+def wordIn(word, string):
+    # for w in string.split(' '):
+    #     if word.lower() == w.lower():
+    #         return True
+    return wordPattern(word).search(string) != None
+
+#Method to compile the regular expression to search for a word,
+#which remembers the most recently used ones so they don't have to be compiled again
+@functools.lru_cache(maxsize = 4096)
+def wordPattern(word):
+    return re.compile(r'\b' + word + r'\b', flags = re.IGNORECASE)
+
+#Method to return the shingles (every substring of three characters) of a string for the '~' operator (see 'Node.similarCompare'),
+#after removing HTML tags, unescaping HTML entities, ignoring case and collapsing white space.
+#A string shorter than three characters is a single shingle and an empty string has none.
+#The most recently used ones are remembered, since the value of a note is compared to several other notes
+@functools.lru_cache(maxsize = 4096)
+def shingles(string):
+    string = html.unescape(re.sub(r'<[^>]*>', ' ', string))
+    string = ' '.join(string.casefold().split())
+    if len(string) < 3:
+        return frozenset([string]) if string != '' else frozenset()
+    return frozenset(string[i : i + 3] for i in range(len(string) - 2))
+
+#Method to check if the Jaccard similarity of the shingles of two strings
+#(the number of shared shingles divided by the number of distinct shingles of both) is at least 'threshold'
+def similar(left, right, threshold):
+    leftShingles = shingles(left)
+    rightShingles = shingles(right)
+    if len(leftShingles) == 0 or len(rightShingles) == 0:
+        return False
+    shared = len(leftShingles & rightShingles)
+    return shared / (len(leftShingles) + len(rightShingles) - shared) >= threshold
+
+#The ways in which the values of a compare field can be normalized before they are compared, as (option, description).
+#The options of a field are always applied in this order
+NORMALIZATIONS = [
+    ('cloze', 'Remove cloze markup'),
+    ('html', 'Strip HTML tags'),
+    ('entities', 'Unescape HTML entities (f.e. &nbsp;)'),
+    ('unicode', 'Unicode compatibility (NFKC)'),
+    ('case', 'Ignore case'),
+    ('whitespace', 'Collapse white space')
+]
+
+#Method to remove cloze markup from a string, keeping the text of the clozes
+def removeCloze(string):
+    return re.sub(r'{{.+?::|::.+?}}|}}', '', string)
+
+#Method to return a function which normalizes a value with the given options (see 'NORMALIZATIONS'),
+#which remembers the most recently used ones so they don't have to be created again for every note
+@functools.lru_cache(maxsize = 64)
+def normalizer(options):
+    steps = []
+    if 'cloze' in options:
+        steps.append(removeCloze)
+    if 'html' in options:
+
+        #Line breaks and tags which start a new line become a space
+        breakPattern = re.compile(r'<(br|/?div|/?p|/?li)\b[^>]*>', flags = re.IGNORECASE)
+        tagPattern = re.compile(r'<[^>]*>')
+        steps.append(lambda string: tagPattern.sub('', breakPattern.sub(' ', string)))
+    if 'entities' in options:
+        steps.append(html.unescape)
+    if 'unicode' in options:
+        steps.append(lambda string: unicodedata.normalize('NFKC', string))
+    if 'case' in options:
+        steps.append(str.casefold)
+    if 'whitespace' in options:
+        steps.append(lambda string: ' '.join(string.split()))
+
+    def normalize(string):
+        for step in steps:
+            string = step(string)
+        return string.strip()
+    return normalize
+
+#Method to remove brackets from a conditional string
+def removeBrackets(string):
+
+    #Remove any white space characters from the start and end
+    string = string.strip()
+
+    #Check the number of opening and closing brackets and throw an exception
+    #when not all brackets have been closed
+    openBr = 0
+    minOpenBr = -1
+    lastMinOpenBr = -1
+    lastCh = ''
+    start = True
+    for i in range(len(string)):
+        ch = string[i]
+
+        #When two following characters aren't the same,
+        #update whether the start has been passed (defined as after all of the opening brackets at the start)
+        diffCh = lastCh != ch and i != len(string) - 1
+        if diffCh and start and i > 0:
+            start = False
+
+        #Save the minimum number of brackets seen after the start
+        if not start and (minOpenBr == -1 or openBr < minOpenBr):
+            minOpenBr = openBr
+
+        #When two following characters aren't the same,
+        #save the minimum number of opening brackets.
+        #At the end this will thus contain the minimum number of not closed brackets seen in the middle of the string.
+        if diffCh:
+            lastMinOpenBr = minOpenBr
+
+        #Increment the open bracket counter according to the bracket
+        if ch == '(':
+            openBr += 1
+        elif ch == ')':
+            if openBr > 0:
+                openBr -= 1
+            else:
+                raise re.error('You have too many closing brackets.')
+
+        #Save the last character
+        lastCh = ch
+
+    #When openBr is now not 0, raise an error
+    if openBr != 0:
+        raise re.error('Not all brackets have been closed.')
+
+    #Remove as many brackets from the start and end
+    #as the minimum number of open brackets seen in the middle of the string
+    #and return the string
+    return string[lastMinOpenBr : len(string) - lastMinOpenBr] if lastMinOpenBr != -1 else string
+    
+
+
@@ -1,18 +1,13 @@
 #Import basic modules
 import os
 
-#Import the main window object (mw) from aqt
-from aqt import mw
-
-#Import the "show info" tool from utils.py
-from aqt.utils import showInfo
-
-#Import all of the Qt GUI library
-from aqt.qt import *
-
-#Import local .py modules
-from . import Utils, MainWindow
-echo = Utils.echo
+#Import the main window object (mw) from aqt.
+#This package is also imported by the worker processes of a parallel comparison (see Parallel.py),
+#which don't run Anki, so the add-on is only set up when the main window exists
+try:
+    from aqt import mw
+except ImportError:
+    mw = None
 
 #This is the function for starting the program
 def main():
@@ -24,13 +19,18 @@ def main():
     #Run the dialog
     dialog.show()
 
+if mw != None:
 
-#Create a new menu item
-action = QAction("Note Comparer", mw)
-#Set it to call the main function when it's clicked
-action.triggered.connect(main)
-#And add it to the tools menu
-mw.form.menuTools.addAction(action)
-
+    #Import all of the Qt GUI library
+    from aqt.qt import *
 
+    #Import local .py modules
+    from . import Utils, MainWindow
+    echo = Utils.echo
 
+    #Create a new menu item
+    action = QAction("Note Comparer", mw)
+    #Set it to call the main function when it's clicked
+    action.triggered.connect(main)
+    #And add it to the tools menu
+    mw.form.menuTools.addAction(action)
@@ -0,0 +1,264 @@
+#Import basic modules
+import os, sys, json, time, shutil, argparse, platform, tempfile, importlib, tracemalloc
+
+#Import the fake collection, which is kept next to this file
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from FakeCollection import FakeCollection, FakeMainWindow
+from Generator import Generator
+
+#The folder of the add-on and the folder with the stand-ins for Anki's 'aqt' and 'anki' packages
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+stubs = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stubs')
+
+#The settings of every mode: the compare fields of both groups with their regex and normalization options
+#and the conditions in advanced mode
+modes = {
+    'simple': {'fields': [('Front', '', [])], 'advancedMode': False, 'regexCapture': False, 'conditions': ''},
+    'advanced': {'fields': [('Front', '', []), ('Back', '', [])], 'advancedMode': True, 'regexCapture': False,
+        'conditions': 'G1F1 = G2F1 and G1F2 in G2F2'},
+    'regex': {'fields': [('Front', r'(\w+) (\w+)', [])], 'advancedMode': True, 'regexCapture': True,
+        'conditions': 'G1F1R1 = G2F1R1 and G1F1R2 = G2F1R2'},
+    'normalized': {'fields': [('Front', '', ['cloze', 'html', 'entities', 'case', 'whitespace'])], 'advancedMode': False,
+        'regexCapture': False, 'conditions': ''},
+    'fullJoin': {'fields': [('Front', '', []), ('Back', '', [])], 'advancedMode': True, 'regexCapture': False,
+        'conditions': 'G1F1 = G2F1 or G1F2 = G2F2'}
+}
+
+#The mode of the join benchmark, of which the condition can't be used to index a group so that every combination of notes is visited.
+#It isn't run for every size, since the number of combinations grows with the square of the number of notes
+joinMode = 'fullJoin'
+
+#The maximum number of rows of the queue of which the conditions are solved again in the 'solve' phase
+maxSolveRows = 10000
+
+#The phases that are timed, in the order in which they are done
+phases = ['fieldInfo', 'select', 'load', 'compare', 'run', 'solve', 'actions']
+
+#Function to import the add-on as a package without Anki and return it,
+#which is also done by the worker processes of a parallel comparison since both folders are added to 'sys.path'
+def importAddon():
+    for folder in [stubs, os.path.dirname(root)]:
+        if folder not in sys.path:
+            sys.path.insert(0, folder)
+    return importlib.import_module(os.path.basename(root))
+
+#Function to time a single run of the add-on in a mode on a copy of the collection at 'path'
+#and return the number of seconds of every phase, the number of duplicates found and the memory used by finding the duplicates.
+#When 'traceMemory' is set, the allocations while finding the duplicates are traced with 'tracemalloc' (which makes it a lot slower),
+#giving the peak number of bytes and the number of memory blocks (and their bytes) that are still allocated afterwards, such as the rows of the queue
+def runOnce(packageName, path, mode, workers, traceMemory = False):
+    settings = modes[mode]
+    Comparer = importlib.import_module(packageName + '.Comparer').Comparer
+    Group = importlib.import_module(packageName + '.Group').Group
+    col = FakeCollection(path)
+    FakeMainWindow(col).install(packageName)
+    times = {}
+    memory = {}
+
+    try:
+
+        #Create the field info of the collection
+        startTime = time.perf_counter()
+        comparer = Comparer()
+        times['fieldInfo'] = time.perf_counter() - startTime
+
+        comparer.workers = workers
+        comparer.useCache = False
+        comparer.advancedMode = settings['advancedMode']
+        comparer.regexCapture = settings['regexCapture']
+        if comparer.advancedMode:
+            comparer.conditionString = settings['conditions']
+            comparer.conditionTree.setString(comparer.conditionString)
+            comparer.conditionTree.createChildren()
+
+        #Select the decks of both groups with their compare fields and actions
+        for groupIndex, action in enumerate(['Suspend', 'Tag with...']):
+            group = Group(groupIndex, comparer)
+            group.type = 'Deck'
+            group.name = f'Group {groupIndex + 1}'
+            group.duplicateAction = action
+            group.duplicateActionTag = 'duplicate'
+            possibleFields = {f['name']: f for f in group.getPossibleFields()}
+            group.fields = [{'field': possibleFields[name], 'regex': regex, 'normalize': normalize} for name, regex, normalize in settings['fields']]
+            comparer.groups.append(group)
+
+        startTime = time.perf_counter()
+        comparer.getNoteIDs()
+        times['select'] = time.perf_counter() - startTime
+
+        #Run the comparison, of which the time spent finding the duplicates is measured separately from loading the notes
+        findDuplicates = comparer.findDuplicates
+        def timedFindDuplicates(*args, **kwargs):
+            if traceMemory:
+                tracemalloc.start()
+            compareStart = time.perf_counter()
+            try:
+                return findDuplicates(*args, **kwargs)
+            finally:
+                times['compare'] = time.perf_counter() - compareStart
+                if traceMemory:
+                    traces = tracemalloc.take_snapshot().traces
+                    memory['peakBytes'] = tracemalloc.get_traced_memory()[1]
+                    memory['allocatedBlocks'] = len(traces)
+                    memory['allocatedBytes'] = sum(trace.size for trace in traces)
+                    tracemalloc.stop()
+        comparer.findDuplicates = timedFindDuplicates
+
+        errors = []
+        comparer.error.connect(errors.append)
+        startTime = time.perf_counter()
+        comparer.run()
+        times['run'] = time.perf_counter() - startTime
+        if len(errors) > 0:
+            raise RuntimeError(errors[0])
+        times['load'] = times['run'] - times.get('compare', 0)
+        numDuplicates = len(comparer.queue)
+
+        #Solve the conditions of the duplicates again, as is done for every row while the queue is built in advanced mode
+        if comparer.advancedMode:
+            startTime = time.perf_counter()
+            for row in comparer.queue[:maxSolveRows]:
+                comparer.solveConditions(row)
+            times['solve'] = time.perf_counter() - startTime
+
+        #Perform the actions of all of the duplicates
+        startTime = time.perf_counter()
+        comparer.performActions(len(comparer.queue))
+        times['actions'] = time.perf_counter() - startTime
+
+    finally:
+        col.db.connection.close()
+
+    return times, numDuplicates, memory
+
+#Function to run the benchmarks and return the results.
+#Every collection is generated once and every repetition runs on a fresh copy of it, of which the fastest time of every phase is kept.
+#When 'joinSize' isn't 0, the join that visits every combination of 'joinSize' notes per group is also measured (see 'runJoin')
+def runBenchmarks(sizes, modeNames, repeat, workers, generatorSettings, joinSize = 0, log = print):
+    packageName = importAddon().__name__
+    Utils = importlib.import_module(packageName + '.Utils')
+
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+
+        #Keep the files of the add-on (the last runs and checkpoints) out of its 'user_files' folder
+        userFile = Utils.userFile
+        Utils.userFile = lambda name: os.path.join(folder, name)
+        try:
+            for size in sizes:
+                path = os.path.join(folder, f'collection-{size}.db')
+                startTime = time.perf_counter()
+                Generator(size, **generatorSettings).write(path)
+                log(f'Generated {size} notes per group in {time.perf_counter() - startTime:.2f} s')
+
+                for mode in modeNames:
+                    result = runMode(packageName, folder, path, mode, size, repeat, workers)
+                    results.append(result)
+                    log(f'{mode:>10} {size:>7} notes: ' + ', '.join(f'{phase} {result[phase]:.3f} s' for phase in phases if phase in result)
+                        + f" ({result['duplicates']} duplicates)")
+
+            if joinSize > 0:
+                result = runJoin(packageName, folder, joinSize, repeat, generatorSettings)
+                results.append(result)
+                log(f"{joinMode:>10} {joinSize:>7} notes: {result['combinations']} combinations, compare {result['compare']:.3f} s, "
+                    + f"{result['secondsPerMillion']:.3f} s per 1M combinations, peak {result['peakBytes'] / 1024:.0f} KiB, "
+                    + f"{result['allocatedBlocks']} blocks ({result['allocatedBytes'] / 1024:.0f} KiB) still allocated ({result['duplicates']} duplicates)")
+        finally:
+            Utils.userFile = userFile
+
+    return results
+
+#Function to run a mode on fresh copies of the collection at 'path' in the folder 'folder' 'repeat' times
+#and return the result with the fastest time of every phase
+def runMode(packageName, folder, path, mode, size, repeat, workers):
+    best = {}
+    for i in range(repeat):
+        copy = os.path.join(folder, 'collection.db')
+        shutil.copyfile(path, copy)
+        times, numDuplicates, memory = runOnce(packageName, copy, mode, workers)
+        for phase, seconds in times.items():
+            best[phase] = min(best.get(phase, seconds), seconds)
+
+    result = {'mode': mode, 'notesPerGroup': size, 'duplicates': numDuplicates}
+    result.update({phase: round(best[phase], 4) for phase in phases if phase in best})
+    return result
+
+#Function to measure the join that visits every combination of 'size' notes per group in a single process:
+#the wall time per million combinations (of the fastest of 'repeat' runs) and the memory used by the join (of a separate run, since tracing it is slow)
+def runJoin(packageName, folder, size, repeat, generatorSettings):
+    path = os.path.join(folder, f'join-{size}.db')
+    Generator(size, **generatorSettings).write(path)
+    result = runMode(packageName, folder, path, joinMode, size, repeat, 1)
+
+    copy = os.path.join(folder, 'collection.db')
+    shutil.copyfile(path, copy)
+    times, numDuplicates, memory = runOnce(packageName, copy, joinMode, 1, traceMemory = True)
+
+    result['combinations'] = size * size
+    result['secondsPerMillion'] = round(result['compare'] / (size * size) * 1000000, 4)
+    result.update(memory)
+    return result
+
+#Function to compare results with the results of an earlier run ('baseline') and return a description of every phase
+#that has become more than 'threshold' (a fraction) slower. Differences of less than 'minSeconds' are ignored as noise
+def findRegressions(results, baseline, threshold, minSeconds = 0.01):
+    baselineResults = {(r['mode'], r['notesPerGroup']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        old = baselineResults.get((result['mode'], result['notesPerGroup']))
+        if old == None:
+            continue
+        for phase in phases:
+            if phase in result and phase in old and result[phase] - old[phase] > max(old[phase] * threshold, minSeconds):
+                regressions.append(f"{result['mode']} {result['notesPerGroup']} notes, {phase}: {old[phase]:.3f} s -> {result[phase]:.3f} s")
+    return regressions
+
+def main(args = None):
+    parser = argparse.ArgumentParser(description = 'Time the phases of a comparison of the add-on on synthetic collections without Anki.')
+    parser.add_argument('--sizes', type = int, nargs = '+', default = [1000, 10000, 100000], help = 'the numbers of notes per group')
+    parser.add_argument('--modes', nargs = '+', choices = list(modes), default = [mode for mode in modes if mode != joinMode], help = 'the modes to compare the notes in')
+    parser.add_argument('--repeat', type = int, default = 3, help = 'the number of runs of which the fastest is kept')
+    parser.add_argument('--workers', type = int, default = 1, help = 'the number of processes to compare the notes in')
+    parser.add_argument('--join-size', type = int, default = 1000,
+        help = 'the number of notes per group of the join that visits every combination of notes and of which the allocations are traced (0 to skip it)')
+    parser.add_argument('--field-words', type = int, default = 8, help = 'the average number of words of a field')
+    parser.add_argument('--html-rate', type = float, default = 0.2, help = 'the rate of fields with HTML markup')
+    parser.add_argument('--cloze-rate', type = float, default = 0.1, help = 'the rate of fields with a cloze deletion')
+    parser.add_argument('--duplicate-rate', type = float, default = 0.05, help = 'the rate of notes of the second group which copy a note of the first')
+    parser.add_argument('--seed', type = int, default = 0, help = 'the seed of the generated collections')
+    parser.add_argument('--output', help = 'the JSON file to write the results to')
+    parser.add_argument('--baseline', help = 'a JSON file with earlier results to compare the results with')
+    parser.add_argument('--threshold', type = float, default = 0.2, help = 'the fraction a phase may be slower than the baseline')
+    args = parser.parse_args(args)
+
+    generatorSettings = {
+        'fieldWords': args.field_words,
+        'htmlRate': args.html_rate,
+        'clozeRate': args.cloze_rate,
+        'duplicateRate': args.duplicate_rate,
+        'seed': args.seed
+    }
+    results = runBenchmarks(args.sizes, args.modes, args.repeat, args.workers, generatorSettings, args.join_size)
+
+    if args.output != None:
+        with open(args.output, 'w', encoding = 'utf-8') as file:
+            json.dump({
+                'version': 1,
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'settings': dict(generatorSettings, repeat = args.repeat, workers = args.workers, joinSize = args.join_size),
+                'results': results
+            }, file, indent = 2)
+
+    #Exit with an error code when any phase has become slower than the baseline
+    if args.baseline != None:
+        with open(args.baseline, 'r', encoding = 'utf-8') as file:
+            regressions = findRegressions(results, json.load(file), args.threshold)
+        for regression in regressions:
+            print(f'Regression: {regression}')
+        if len(regressions) > 0:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
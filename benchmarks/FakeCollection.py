@@ -0,0 +1,183 @@
+#Import basic modules
+import os, re, sys, json, sqlite3, time
+
+#Class for the database of a fake collection, with the same methods as the database of an Anki collection ('mw.col.db')
+class FakeDB:
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+
+    def execute(self, sql, *args):
+        return self.connection.execute(sql, args).fetchall()
+
+    def list(self, sql, *args):
+        return [row[0] for row in self.connection.execute(sql, args)]
+
+    def first(self, sql, *args):
+        return self.connection.execute(sql, args).fetchone()
+
+    def scalar(self, sql, *args):
+        row = self.connection.execute(sql, args).fetchone()
+        return row[0] if row != None else None
+
+    def commit(self):
+        self.connection.commit()
+
+    def rollback(self):
+        self.connection.rollback()
+
+#Class for a note of a fake collection, with the methods of an Anki note the add-on uses
+class FakeNote:
+
+    def __init__(self, col, id):
+        row = col.db.first('select mid, flds, tags from notes where id = ?', id)
+        if row == None:
+            raise KeyError(f'Note {id} does not exist')
+
+        self.col = col
+        self.id = id
+        self.mid = row[0]
+        self.fields = row[1].split('\x1f')
+        self.tags = row[2].split()
+        self.fieldNames = [f['name'] for f in col.models.get(self.mid)['flds']]
+
+    def __getitem__(self, name):
+        return self.fields[self.fieldNames.index(name)]
+
+    def __setitem__(self, name, value):
+        self.fields[self.fieldNames.index(name)] = value
+
+    def addTag(self, tag):
+        if tag.lower() not in [t.lower() for t in self.tags]:
+            self.tags.append(tag)
+
+    def flush(self):
+        self.col.db.execute('update notes set flds = ?, tags = ?, sfld = ?, mod = ?, usn = ? where id = ?',
+            '\x1f'.join(self.fields), f' {" ".join(self.tags)} ' if len(self.tags) > 0 else '', self.fields[0],
+            int(time.time()), self.col.usn(), self.id)
+
+#Class for the note types (models) of a fake collection, which are kept in the 'col' table like older versions of Anki do
+class FakeModels:
+
+    def __init__(self, col):
+        self.models = {m['id']: m for m in col.loadJson('models')}
+
+    def all(self):
+        return list(self.models.values())
+
+    def get(self, id):
+        return self.models.get(id)
+
+#Class for the decks of a fake collection
+class FakeDecks:
+
+    def __init__(self, col):
+        self.decks = col.loadJson('decks')
+
+    def all(self):
+        return self.decks
+
+    def children(self, did):
+        name = [d['name'] for d in self.decks if d['id'] == did][0]
+        return [(d['name'], d['id']) for d in self.decks if d['name'].startswith(name + '::')]
+
+#Class for the tags of a fake collection
+class FakeTags:
+
+    def __init__(self, col):
+        self.col = col
+
+    def all(self):
+        tags = set()
+        for row in self.col.db.execute("select distinct tags from notes where tags != ''"):
+            tags.update(row[0].split())
+        return sorted(tags)
+
+    def bulk_add(self, ids, tags):
+        for noteID in ids:
+            note = FakeNote(self.col, noteID)
+            for tag in tags.split():
+                note.addTag(tag)
+            note.flush()
+
+#Class for the scheduler of a fake collection, which only (un)suspends cards.
+#Like in Anki, an unsuspended card goes back to the queue of its type
+class FakeScheduler:
+
+    def __init__(self, col):
+        self.col = col
+
+    def suspend_cards(self, ids):
+        self.col.db.execute(f'update cards set queue = -1, mod = ?, usn = ? where id in ({",".join(str(int(i)) for i in ids)})',
+            int(time.time()), self.col.usn())
+
+    def unsuspend_cards(self, ids):
+        self.col.db.execute(f'update cards set queue = type, mod = ?, usn = ? where queue = -1 and id in ({",".join(str(int(i)) for i in ids)})',
+            int(time.time()), self.col.usn())
+
+#Class for a fake Anki collection stored in an SQLite file (see Generator.py),
+#with the parts of the collection (mw.col) that the add-on uses
+class FakeCollection:
+
+    def __init__(self, path):
+        self.path = path
+        self.db = FakeDB(path)
+        self.models = FakeModels(self)
+        self.decks = FakeDecks(self)
+        self.tags = FakeTags(self)
+        self.sched = FakeScheduler(self)
+
+    #Method to load the note types or decks as saved by the generator
+    def loadJson(self, column):
+        return json.loads(self.db.first(f'select {column} from col')[0])
+
+    def usn(self):
+        return -1
+
+    #Methods for the undo history, of which only undoing the changes since the last undo entry has been added is supported
+    def add_custom_undo_entry(self, name):
+        self.db.commit()
+        return 1
+
+    def merge_undo_entries(self, target):
+        pass
+
+    def undo(self):
+        self.db.rollback()
+
+    def get_note(self, id):
+        return FakeNote(self, id)
+
+    def update_notes(self, notes):
+        for note in notes:
+            note.flush()
+
+    def remove_notes(self, ids):
+        self.db.execute(f'delete from cards where nid in ({",".join(str(int(i)) for i in ids)})')
+        self.db.execute(f'delete from notes where id in ({",".join(str(int(i)) for i in ids)})')
+
+    #Method to find notes with a search, of which only 'deck:"name"' and 'note:"name"' are supported
+    def find_notes(self, search):
+        match = re.fullmatch(r'(deck|note):"(.*)"', search)
+        if match == None:
+            raise ValueError(f'Unsupported search: {search}')
+        kind, name = match.groups()
+
+        if kind == 'deck':
+            dids = [d['id'] for d in self.decks.all() if d['name'] == name or d['name'].startswith(name + '::')]
+            return self.db.list(f'select distinct nid from cards where did in ({",".join(str(d) for d in dids)}) order by nid')
+        mids = [m['id'] for m in self.models.all() if m['name'] == name]
+        return self.db.list(f'select id from notes where mid in ({",".join(str(m) for m in mids)}) order by id')
+
+#Class for a fake Anki main window (mw), which only has a collection
+class FakeMainWindow:
+
+    def __init__(self, col):
+        self.col = col
+
+    #Method to set the fake main window as 'mw' in every module of the add-on that imported it.
+    #The add-on is imported while 'aqt.mw' is 'None' (see stubs/aqt/__init__.py), so it doesn't add itself to the menu
+    def install(self, packageName):
+        for name, module in list(sys.modules.items()):
+            if (name == packageName or name.startswith(packageName + '.')) and hasattr(module, 'mw'):
+                module.mw = self
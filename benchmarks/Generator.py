@@ -0,0 +1,90 @@
+#Import basic modules
+import os, json, random, sqlite3, time
+
+#Class to generate a synthetic collection in an SQLite file which can be opened by a fake collection (see FakeCollection.py).
+#The collection has a single note type 'Basic' (with the fields 'Front' and 'Back') and two decks 'Group 1' and 'Group 2'
+#with 'numNotes' notes each. The notes of the second deck copy the fields of a note of the first deck at 'duplicateRate'
+class Generator:
+
+    #The IDs of the note type and the decks
+    noteTypeID = 1000000000000
+    deckIDs = [1000000000001, 1000000000002]
+
+    #'fieldWords' is the number of words of a field, 'htmlRate' and 'clozeRate' are the rates of fields
+    #with HTML markup and cloze deletions and 'seed' makes the same collection every time
+    def __init__(self, numNotes, fieldWords = 8, htmlRate = 0.2, clozeRate = 0.1, duplicateRate = 0.05, seed = 0):
+        self.numNotes = numNotes
+        self.fieldWords = fieldWords
+        self.htmlRate = htmlRate
+        self.clozeRate = clozeRate
+        self.duplicateRate = duplicateRate
+        self.random = random.Random(seed)
+        self.words = self.createWords(20000)
+
+    #Method to create a vocabulary of distinct random words
+    def createWords(self, numWords):
+        words = set()
+        while len(words) < numWords:
+            words.add(''.join(self.random.choice('abcdefghijklmnopqrstuvwxyz') for i in range(self.random.randint(3, 10))))
+        return sorted(words)
+
+    #Method to create the value of a field, which may contain HTML markup or a cloze deletion
+    def createField(self):
+        words = self.random.choices(self.words, k = self.random.randint(max(self.fieldWords // 2, 2), self.fieldWords * 3 // 2 + 2))
+        if self.random.random() < self.clozeRate:
+            i = self.random.randrange(len(words))
+            words[i] = f'{{{{c1::{words[i]}}}}}'
+        if self.random.random() < self.htmlRate:
+            i = self.random.randrange(len(words))
+            words[i] = self.random.choice(['<b>{}</b>', '<i>{}</i>', '<span style="color: red">{}</span>', '{}<br>']).format(words[i])
+        return ' '.join(words)
+
+    #Method to write the collection to the file at 'path', which is replaced when it already exists
+    def write(self, path):
+        if os.path.exists(path):
+            os.remove(path)
+
+        connection = sqlite3.connect(path)
+        connection.executescript('''
+            create table col (models text not null, decks text not null, usn integer not null);
+            create table notes (id integer primary key, guid text not null, mid integer not null, mod integer not null, usn integer not null,
+                tags text not null, flds text not null, sfld text not null, csum integer not null, flags integer not null, data text not null);
+            create table cards (id integer primary key, nid integer not null, did integer not null, ord integer not null, mod integer not null,
+                usn integer not null, type integer not null, queue integer not null, due integer not null);
+            create index ix_cards_nid on cards (nid);
+            create index ix_cards_sched on cards (did, queue, due);
+        ''')
+
+        now = int(time.time())
+        models = [{
+            'id': self.noteTypeID,
+            'name': 'Basic',
+            'mod': now,
+            'flds': [{'name': 'Front', 'ord': 0}, {'name': 'Back', 'ord': 1}],
+            'tmpls': [{'name': 'Card 1', 'ord': 0}]
+        }]
+        decks = [{'id': deckID, 'name': f'Group {i+1}'} for i, deckID in enumerate(self.deckIDs)]
+        connection.execute('insert into col values (?, ?, ?)', (json.dumps(models), json.dumps(decks), 1))
+
+        #Add the notes of both decks with a single card each
+        firstFields = []
+        noteID = now * 1000
+        for deckIndex, deckID in enumerate(self.deckIDs):
+            notes = []
+            cards = []
+            for i in range(self.numNotes):
+                if deckIndex == 1 and self.random.random() < self.duplicateRate:
+                    fields = self.random.choice(firstFields)
+                else:
+                    fields = [self.createField(), self.createField()]
+                if deckIndex == 0:
+                    firstFields.append(fields)
+
+                noteID += 1
+                notes.append((noteID, f'g{noteID}', self.noteTypeID, now, 0, '', '\x1f'.join(fields), fields[0], 0, 0, ''))
+                cards.append((noteID, noteID, deckID, 0, now, 0, 0, 0, i))
+            connection.executemany('insert into notes values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', notes)
+            connection.executemany('insert into cards values (?, ?, ?, ?, ?, ?, ?, ?, ?)', cards)
+
+        connection.commit()
+        connection.close()
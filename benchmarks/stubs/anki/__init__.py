@@ -0,0 +1 @@
+#Stand-in for Anki's 'anki' package, so that the add-on can be imported by the benchmarks without Anki
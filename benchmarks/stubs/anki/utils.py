@@ -0,0 +1,3 @@
+#Stand-in for the function of Anki to create an SQL list of ids
+def ids2str(ids):
+    return '(' + ','.join(str(int(i)) for i in ids) + ')'
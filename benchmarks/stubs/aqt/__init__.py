@@ -0,0 +1,4 @@
+#Stand-in for Anki's 'aqt' package, so that the add-on can be imported by the benchmarks without Anki.
+#The main window is 'None' while the add-on is imported, so that it doesn't add itself to the menu,
+#and is set afterwards by the benchmarks (see 'FakeCollection.install')
+mw = None
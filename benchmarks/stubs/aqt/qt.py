@@ -0,0 +1,37 @@
+#Stand-ins for the few Qt classes the comparison itself uses, so that the benchmarks don't need Qt.
+#Signals call their connected functions right away
+
+#Class for a signal of an object, which calls every connected function when it is emitted
+class BoundSignal:
+
+    def __init__(self):
+        self.functions = []
+
+    def connect(self, function):
+        self.functions.append(function)
+
+    def emit(self, *args):
+        for function in self.functions:
+            function(*args)
+
+#Class for a signal of a class, which creates a bound signal for every object
+class pyqtSignal:
+
+    def __init__(self, *types):
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, owner):
+        if obj == None:
+            return self
+        return obj.__dict__.setdefault('signal_' + self.name, BoundSignal())
+
+class QObject:
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def moveToThread(self, thread):
+        pass